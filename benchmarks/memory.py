@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Measure the memory used by the class models of large interfaces.
+
+Builds the ``types.Class`` model of a synthetic interface with
+``--methods`` virtual methods (which use a small pool of parameter
+types, as real interfaces do), then generates the mock object and mock
+implementation models from it. Reports the memory allocated by each
+stage per method, as measured by ``tracemalloc``. No header is parsed,
+so libclang is not required.
+
+Usage:
+    python benchmarks/memory.py [--methods N [N ...]]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from drmock import generator
+from drmock import types
+
+PARAMS = [
+    "int",
+    "const std::string &",
+    "std::vector<int> &&",
+    "const char *",
+    "double",
+    "std::shared_ptr<Foo>",
+    "const Foo &",
+]
+
+
+def make_class(methods: int) -> types.Class:
+    result = types.Class("IFoo", enclosing_namespace=["outer", "inner"])
+    for i in range(methods):
+        params = [
+            types.Type.from_spelling(PARAMS[(i + j) % len(PARAMS)])
+            for j in range(i % 4)
+        ]
+        result.members.append(
+            types.Method(
+                name=f"method{i // 2}",  # Pairs of overloads.
+                params=params,
+                return_type=types.Type.from_spelling(PARAMS[i % len(PARAMS)]),
+                const=bool(i % 2),
+                virtual=True,
+                pure_virtual=True,
+            )
+        )
+    return result
+
+
+def make_mock(class_: types.Class) -> tuple:
+    analysis = generator._analyze(class_, ["public"])
+    return (
+        generator._generate_mock_object(class_, analysis, "", "ctrl"),
+        generator._generate_mock_implementation("FooMock", class_, analysis, ""),
+    )
+
+
+def measure(methods: int) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    class_ = make_class(methods)
+    model = tracemalloc.get_traced_memory()[0]
+    mock = make_mock(class_)
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del class_, mock
+    return model / methods, (total - model) / methods
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--methods", "-m", type=int, nargs="+", default=[100, 1000, 10000]
+    )
+    args = parser.parse_args()
+    print(f"{'methods':>10}{'model [B/method]':>20}{'mock [B/method]':>20}")
+    for methods in args.methods:
+        model, mock = measure(methods)
+        print(f"{methods:>10}{model:>20.0f}{mock:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
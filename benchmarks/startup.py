@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Measure the startup time of drmock-generator.
+
+Runs each command ``--repeat`` times in a fresh interpreter and reports
+the best and the median wall time. The bare interpreter is the baseline;
+``import drmock.commandline`` and ``--help`` should be close to it, as
+``clang.cindex`` is only imported when a header is actually parsed.
+
+Usage:
+    python benchmarks/startup.py [--repeat N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+_HELP = (
+    "import sys; sys.argv = ['drmock-generator', '--help'];"
+    " from drmock import commandline; commandline.main()"
+)
+
+COMMANDS = [
+    ("bare python", "pass"),
+    ("import clang.cindex", "import clang.cindex"),
+    ("import drmock.commandline", "import drmock.commandline"),
+    ("drmock-generator --help", _HELP),
+]
+
+
+def measure(code: str, repeat: int) -> list:
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+        result.append(time.perf_counter() - start)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", "-r", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'command':<30}{'best [ms]':>12}{'median [ms]':>14}")
+    for name, code in COMMANDS:
+        times = measure(code, args.repeat)
+        print(
+            f"{name:<30}{min(times) * 1000:>12.1f}"
+            f"{statistics.median(times) * 1000:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
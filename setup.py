@@ -2,11 +2,16 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import re
+
 from setuptools import setup
 
 with open('README.md') as readme:
     long_description = readme.read()
 
+with open('src/drmock/__init__.py') as init:
+    version = re.search(r'__version__ = "(.*)"', init.read()).group(1)
+
 setup(
     name='drmock-generator',
     author='Malte Kliemann, Ole Kliemann',
@@ -14,7 +19,7 @@ setup(
     long_description=long_description,
     long_description_content_type='text/markdown',
     license='GLP-3.0-or-later',
-    version='0.6.0',
+    version=version,
     packages=['drmock'],
     package_dir={'': 'src'},
     entry_points={
@@ -0,0 +1,263 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""For generating the mocks of many headers in a single process.
+
+A manifest lists the entries of a batch run. It's either a JSON file
+(with extension ``.json``) or a text file.
+
+Each line of a text manifest holds the command line arguments of one
+call of ``drmock-generator`` (blank lines and lines starting with ``#``
+are ignored):
+
+```
+IFoo.h FooMock.h --input-class IFoo --flags --std=c++17
+IBar.h BarMock.h -i IBar -o BarMock --flags --std=c++17 -fPIC
+```
+
+A JSON manifest holds a list of entries. Each entry is either a list of
+command line arguments or an object whose keys are the long names of
+the command line arguments:
+
+```json
+[
+    {"input_path": "IFoo.h", "output_path": "FooMock.h", "flags": ["--std=c++17"]},
+    ["IBar.h", "BarMock.h", "-i", "IBar", "--flags", "--std=c++17"]
+]
+```
+
+Options like ``--cache-dir``, ``--pch-cache``, ``--parse-profile``,
+``--depfile``, ``--single-file`` or ``--verbose`` given next to
+``--batch`` apply to every entry which doesn't set them. The compiler
+flags must be set per entry; ``--flags`` is not allowed with
+``--batch``.
+
+The entries may be spread across a pool of worker processes, each of
+which loads libclang once. The output and errors of the entries are
+reported in the order of the manifest, no matter which entry finishes
+first.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import shlex
+import sys
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from drmock import generator
+from drmock import utils
+
+_ParseArgs = Callable[[List[str]], argparse.Namespace]
+_Result = Tuple[str, Optional[str]]  # The output and the error message
+
+
+@dataclasses.dataclass
+class InvalidEntry:
+    """An entry of a manifest which couldn't be parsed.
+
+    Attributes:
+        location: The path of the manifest and the line (or index) of
+            the entry
+        error: The error message
+    """
+
+    location: str
+    error: str
+
+
+def read_manifest(
+    path: str, parse_args: _ParseArgs
+) -> list[Union[argparse.Namespace, InvalidEntry]]:
+    """Read the entries of a manifest.
+
+    Args:
+        path: The path to the manifest
+        parse_args: Function which turns commandline args into a namespace
+
+    Returns:
+        The parsed entries; entries with invalid arguments are returned
+        as ``InvalidEntry`` objects, so that they don't abort the batch
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If reading the manifest fails or if it is not a list of
+            entries
+    """
+    try:
+        with open(path, "r") as f:
+            content = f.read()
+    except (FileNotFoundError, IOError) as e:
+        raise utils.DrMockRuntimeError(str(e))
+
+    if path.endswith(".json"):
+        try:
+            entries = json.loads(content)
+        except ValueError as e:
+            raise utils.DrMockRuntimeError(f"{path}: {e}")
+        if not isinstance(entries, list):
+            raise utils.DrMockRuntimeError(f"{path}: expected a list of entries")
+        located = [(f"{path}: entry {i}", each) for i, each in enumerate(entries)]
+        to_argv = _entry_to_argv
+    else:
+        located = [
+            (f"{path}:{i + 1}", line)
+            for i, line in enumerate(content.splitlines())
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+        to_argv = _line_to_argv
+
+    result = []
+    for location, each in located:
+        try:
+            result.append(_parse_entry(to_argv(each), parse_args))
+        except utils.DrMockRuntimeError as e:
+            result.append(InvalidEntry(location, str(e)))
+    return result
+
+
+def _line_to_argv(line: str) -> list[str]:
+    """Convert a line of a text manifest into commandline args."""
+    try:
+        return shlex.split(line)
+    except ValueError as e:  # Unmatched quotes.
+        raise utils.DrMockRuntimeError(str(e))
+
+
+def _parse_entry(argv: list[str], parse_args: _ParseArgs) -> argparse.Namespace:
+    """Parse the args of an entry of a manifest.
+
+    Raises:
+        utils.DrMockRuntimeError: If the args are invalid
+    """
+    stderr = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(stderr):
+            return parse_args(argv)
+    except SystemExit:  # Raised by argparse on invalid arguments.
+        # Report argparse's message, but not the usage.
+        lines = stderr.getvalue().strip().splitlines()
+        message = lines[-1].partition("error: ")[2] if lines else ""
+        raise utils.DrMockRuntimeError(message or "invalid arguments")
+
+
+def _entry_to_argv(entry: Union[Sequence[str], dict[str, Any]]) -> list[str]:
+    """Convert an entry of a JSON manifest into commandline args."""
+    if isinstance(entry, list):
+        return [str(each) for each in entry]
+    if not isinstance(entry, dict):
+        raise utils.DrMockRuntimeError(f"invalid manifest entry: {entry}")
+    try:
+        result = [entry["input_path"], entry["output_path"]]
+    except KeyError as e:
+        raise utils.DrMockRuntimeError(f"manifest entry is missing the key {e}")
+    for key, value in entry.items():
+        if key in {"input_path", "output_path", "flags"}:
+            continue
+        option = "--" + key.replace("_", "-")
+        if isinstance(value, bool):  # Switches like ``--all-classes``.
+            result += [option] if value else []
+        else:
+            result += [option, str(value)]
+    # NOTE --flags must always be last!
+    flags = entry.get("flags", [])
+    if flags:
+        result += ["--flags"] + [str(each) for each in flags]
+    return result
+
+
+def run(
+    entries: Sequence[Union[argparse.Namespace, InvalidEntry]],
+    jobs: int = 1,
+    clang_library_file: Optional[str] = None,
+) -> int:
+    """Generate the mocks of all entries and return the exit status.
+
+    Args:
+        entries: The entries of the batch
+        jobs:
+            The number of worker processes; if ``jobs`` is ``0``, one
+            worker per CPU is used; if ``jobs`` is ``1``, the entries
+            are processed in the current process
+        clang_library_file: The libclang which the workers preload
+
+    An error in one entry (including an ``InvalidEntry``) is reported on
+    ``stderr``, but doesn't abort the batch. The exit status is ``1`` if
+    any entry failed, otherwise ``0``.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(entries))
+    if jobs > 1:
+        import concurrent.futures  # Slow to import, and rarely used.
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(clang_library_file,),
+        ) as executor:
+            results = executor.map(_run_entry, entries)
+            failures = _report(entries, results)
+    else:
+        failures = _report(entries, map(_run_entry, entries))
+
+    if failures:
+        print(
+            f"drmock-generator: {failures} of {len(entries)} entries failed",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def _report(
+    entries: Sequence[Union[argparse.Namespace, InvalidEntry]],
+    results: Iterable[_Result],
+) -> int:
+    """Print the output and errors of ``results`` in order.
+
+    Returns:
+        The number of failed entries
+    """
+    failures = 0
+    for each, (output, error) in zip(entries, results):
+        sys.stdout.write(output)
+        if error is not None:
+            if isinstance(each, InvalidEntry):
+                location = each.location
+            else:
+                location = each.input_path
+            print(f"drmock-generator: error: {location}: {error}\n", file=sys.stderr)
+            failures += 1
+    return failures
+
+
+def _init_worker(clang_library_file: Optional[str]) -> None:
+    if clang_library_file:
+        from drmock import translator
+
+        translator.set_library_file(clang_library_file)
+
+
+def _run_entry(args: Union[argparse.Namespace, InvalidEntry]) -> _Result:
+    """Generate the mock of ``args``.
+
+    Returns:
+        The output of the generator and the error message (or ``None``)
+    """
+    if isinstance(args, InvalidEntry):
+        return "", args.error
+    output = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(output):
+        try:
+            generator.main(args)
+        except utils.DrMockRuntimeError as e:
+            error = str(e)
+    return output.getvalue(), error
@@ -0,0 +1,237 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Persistent cache of generated mock files.
+
+The cache maps a hash of all inputs of the generator (the header with
+hidden macros, the compiler flags, the options which select and name
+the mocked class, the drmock version and the libclang library file) to
+the generated header and source. On a cache hit, libclang is not
+needed at all.
+
+An entry holds the mocks of all classes generated by the call and the
+files included by the input header, along with their sizes,
+modification times and SHA-256 digests. An entry is only used if the
+content of none of these files changed. The digest is only computed if
+the modification time differs, so that entries survive a fresh checkout
+(as on CI). Likewise, the libclang library file is identified by its
+digest, which is memoized in the cache directory.
+
+The output paths are not part of the key. They're replaced with a
+placeholder before storing the sources, so that an entry may be used
+from different build directories. (The caller must therefore check the
+output paths of a loaded entry for collisions.)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+import drmock
+from drmock import utils
+
+OUTPUT_PATH_PLACEHOLDER = "@DRMOCK_OUTPUT_PATH@"
+
+# The memo of the digests of the libclang library files, relative to the
+# cache directory.
+LIBRARIES_FILE = "libraries.json"
+
+# The name of the mocked class, the output path, the header and the
+# source of a mock.
+Mock = Tuple[str, str, str, str]
+
+
+def get_key(args, source: str, macros: Iterable[str]) -> str:
+    """Compute the cache key of a call of ``generator.main``.
+
+    Args:
+        args: Holds the commandline arguments
+        source: The input header (with hidden macros)
+        macros: The hidden macros
+    """
+    data = [
+        drmock.__version__,
+        _get_library_fingerprint(args.clang_library_file, args.cache_dir),
+        source,
+        sorted(macros),
+        os.path.abspath(args.input_path),
+        args.input_class,
+        args.output_class,
+        args.access,
+        args.namespace,
+        args.controller,
+        args.parse_profile,
+        args.all_classes,
+        args.single_file,
+        args.flags,
+    ]
+    return hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
+
+
+def _get_library_fingerprint(
+    file: Optional[str], directory: Optional[str]
+) -> Optional[str]:
+    # We're not loading libclang for obtaining its version, as that's
+    # precisely what we're trying to avoid on a cache hit. Hashing the
+    # library on every call is too slow, so its digest is memoized in
+    # ``directory`` (by path, size and modification time).
+    if not file:
+        return None
+    path = os.path.realpath(file)
+    stat = _stat(path)
+    if stat is None:
+        return path
+    if not directory:
+        return _get_digest(path)
+    memo_path = os.path.join(directory, LIBRARIES_FILE)
+    try:
+        with open(memo_path, "r") as f:
+            memo = json.load(f)
+        size, mtime, digest = memo[path]
+        if [size, mtime] == [stat.st_size, stat.st_mtime_ns]:
+            return digest
+    except (OSError, TypeError, ValueError, KeyError):
+        memo = {}
+    digest = _get_digest(path)
+    memo[path] = [stat.st_size, stat.st_mtime_ns, digest]
+    with contextlib.suppress(OSError, utils.DrMockRuntimeError):
+        os.makedirs(directory, exist_ok=True)
+        utils.write_atomic(memo_path, json.dumps(memo))
+    return digest
+
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _get_digest(path: str) -> Optional[str]:
+    """Return the SHA-256 of the content of ``path``, or ``None`` if
+    ``path`` can't be read."""
+    result = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                result.update(chunk)
+    except OSError:
+        return None
+    return result.hexdigest()
+
+
+def _get_file_info(path: str) -> list:
+    """Return the size, modification time and digest of ``path``."""
+    stat = _stat(path)
+    if stat is None:
+        return [None, None, None]
+    return [stat.st_size, stat.st_mtime_ns, _get_digest(path)]
+
+
+def _is_unchanged(info: list) -> bool:
+    """Check if the file described by ``info`` (the path followed by the
+    result of ``_get_file_info``) is unchanged.
+
+    If only the modification time changed, it's updated in ``info``.
+    """
+    path, size, mtime, digest = info
+    stat = _stat(path)
+    if stat is None or size is None:  # Missing files must remain missing.
+        return stat is None and size is None
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime_ns == mtime:
+        return True
+    if _get_digest(path) != digest:
+        return False
+    info[2] = stat.st_mtime_ns
+    return True
+
+
+class Cache:
+    """Directory of generated mock files."""
+
+    def __init__(self, directory: str) -> None:
+        """Args:
+        directory: The cache directory (created if necessary)
+        """
+        self._directory = directory
+
+    def load(
+        self, key: str, get_output_path: Callable[[str], str]
+    ) -> Optional[tuple[list[Mock], list[str]]]:
+        """Return the cached mocks and the files included by the input
+        header, or ``None`` if there's no valid entry for ``key``.
+
+        Args:
+            key: The cache key
+            get_output_path:
+                Maps the name of a mocked class to the path of its mock
+                header
+        """
+        try:
+            with open(self._get_path(key), "r") as f:
+                entry = json.load(f)
+            dependencies = []
+            touched = False
+            for info in entry["dependencies"]:
+                mtime = info[2]
+                if not _is_unchanged(info):
+                    return None
+                touched = touched or info[2] != mtime
+                dependencies.append(info[0])
+            mocks = []
+            for each in entry["mocks"]:
+                output_path = get_output_path(each["class"])
+                source = each["source"].replace(OUTPUT_PATH_PLACEHOLDER, output_path)
+                mocks.append((each["class"], output_path, each["header"], source))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if touched:  # Use the fast path for the new mtimes next time.
+            with contextlib.suppress(utils.DrMockRuntimeError):
+                utils.write_atomic(self._get_path(key), json.dumps(entry))
+        return mocks, dependencies
+
+    def store(
+        self, key: str, mocks: Sequence[Mock], dependencies: Sequence[str] = ()
+    ) -> None:
+        """Store the mocks generated by a call.
+
+        Args:
+            key: The cache key
+            mocks: The mocks
+            dependencies: The files included by the input header
+
+        Raises:
+            utils.DrMockRuntimeError: If writing to the cache fails
+        """
+        # The output path only occurs in the include directive of the
+        # source.
+        entry = {
+            "mocks": [
+                {
+                    "class": class_name,
+                    "header": header,
+                    "source": source.replace(
+                        f'#include "{output_path}"',
+                        f'#include "{OUTPUT_PATH_PLACEHOLDER}"',
+                    ),
+                }
+                for class_name, output_path, header, source in mocks
+            ],
+            "dependencies": [[each] + _get_file_info(each) for each in dependencies],
+        }
+        path = self._get_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        except OSError as e:
+            raise utils.DrMockRuntimeError(str(e))
+        utils.write_atomic(path, json.dumps(entry))
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], key + ".json")
@@ -13,9 +13,22 @@ import os
 import subprocess
 import sys
 
+from drmock import batch
 from drmock import generator
+from drmock import profiles
 from drmock import utils
 
+_BATCH_DEFAULTS = [
+    "clang_library_file",
+    "compile_commands",
+    "pch_cache",
+    "cache_dir",
+    "parse_profile",
+    "depfile",
+    "single_file",
+    "verbose",
+]
+
 _parser = argparse.ArgumentParser(
     description="Create mock object .h and .cpp files",
     formatter_class=argparse.RawTextHelpFormatter,
@@ -31,17 +44,67 @@ input-class must match a class in input-path; if multiple matches are
 found, the first is chosen. output-class may contain a backreference
 (\\1) to a capture group in input-class.
 
+With --all-classes, a mock is generated for every class definition in
+input-path which matches input-class, from a single parse. Use a
+backreference in output_path to name the files after each class, for
+example: drmock-generator IShapes.h 'mocks/\\1Mock.h' -i 'I(.*)' --all-classes
+
 The clang-library-file parameter must either be specified using the
 command line interface, or by setting the CLANG_LIBRARY_FILE environment
 variable.
 
 Use leading :: with -n to specify a global namespace. Otherwise, the
 namespace is relative to the enclosing namespace of the target class.
+
+Use --compile-commands (or set the DRMOCK_GENERATOR_COMPILE_COMMANDS
+environment variable) to take the compiler flags from a compilation
+database. The flags of the translation unit nearest to the input header
+are used; the flags specified with --flags are appended.
+
+Use --single-file to parse the input header without reading the files
+it includes. This is much faster, but only works if the mocked classes
+can be parsed without the declarations from the included files (for
+example, if they only use forward declared types). Otherwise, the
+header is parsed again as usual.
+
+Use --pch-cache (or set the DRMOCK_GENERATOR_PCH_CACHE environment
+variable) to precompile the system/framework headers included at the
+top of the input; the PCH is reused by all headers with the same
+includes and flags.
+
+Use --cache-dir (or set the DRMOCK_GENERATOR_CACHE_DIR environment
+variable) to cache the generated files. The cache is keyed by the input
+header, the options and the drmock and libclang versions; on a hit,
+libclang is not used at all. An entry is discarded if a file included
+by the input header was modified.
+
+Use --depfile to write a Makefile/Ninja depfile next to each generated
+header (with the extension .d). It lists the input header and every
+file it includes, so that the build system regenerates the mock
+exactly when one of them changes.
+
+Use --batch to generate the mocks listed in a manifest file in a single
+process (see the documentation of the drmock.batch module for the
+manifest format). Errors are reported per entry; the exit status is
+non-zero if any entry failed. Use --jobs to spread the entries across
+several worker processes.
+
+Use --watch (with a single input or with --batch) to keep
+drmock-generator running and regenerate the mocks on every change of the
+input headers or the files they include. The headers are reparsed
+incrementally.
+
+Use --serve SOCKET to start a daemon which keeps libclang loaded and
+handles generation requests on the Unix domain socket SOCKET, each in a
+separate process. Then use --connect SOCKET (with the usual arguments)
+to let the daemon generate the mock instead of the current process.
         """
     ),
 )
-_parser.add_argument("input_path", help="path to .h file containing the input class")
-_parser.add_argument("output_path", help="path to output .h")
+_parser.add_argument(
+    "input_path", nargs="?", help="path to .h file containing the input class"
+)
+_parser.add_argument("output_path", nargs="?", help="path to output .h")
 # NOTE It's a bit awkward to do the calculation of the mock class'
 # name _inside_ the tool, but it's the only place where we have
 # access to the mockED class.
@@ -82,6 +145,91 @@ _parser.add_argument(
     default="control",
     help="name of controller/diagnostics member",
 )
+_parser.add_argument(
+    "--compile-commands",
+    default=os.environ.get("DRMOCK_GENERATOR_COMPILE_COMMANDS", None),
+    metavar="PATH",
+    help="take the compiler flags from the compilation database PATH\n"
+    "(compile_commands.json or the directory which contains it)",
+)
+_parser.add_argument(
+    "--pch-cache",
+    default=os.environ.get("DRMOCK_GENERATOR_PCH_CACHE", None),
+    metavar="DIR",
+    help="precompile the leading #include <...> directives of the input\n"
+    "into a PCH stored in DIR",
+)
+_parser.add_argument(
+    "--cache-dir",
+    default=os.environ.get("DRMOCK_GENERATOR_CACHE_DIR", None),
+    metavar="DIR",
+    help="cache the generated files in DIR and reuse them if the inputs\n"
+    "are unchanged",
+)
+_parser.add_argument(
+    "--parse-profile",
+    "-p",
+    default=profiles.DEFAULT_PARSE_PROFILE,
+    choices=list(profiles.PARSE_PROFILES),
+    help="libclang parse options; 'fast' skips function bodies and other\n"
+    "work that is not required for mocking, default is "
+    + profiles.DEFAULT_PARSE_PROFILE,
+)
+_parser.add_argument(
+    "--depfile",
+    action="store_true",
+    help="write a depfile (.d) listing all files included by the input\n"
+    "next to each generated header",
+)
+_parser.add_argument(
+    "--all-classes",
+    action="store_true",
+    help="mock every class matching input-class; output_path may contain\n"
+    "a backreference (\\1) to a capture group in input-class",
+)
+_parser.add_argument(
+    "--single-file",
+    action="store_true",
+    help="parse the input without following #include directives; falls\n"
+    "back to a full parse if the mocked classes are not parsed correctly",
+)
+_parser.add_argument(
+    "--verbose", "-v", action="store_true", help="report details of the run"
+)
+_parser.add_argument(
+    "--batch",
+    "-b",
+    default=None,
+    metavar="MANIFEST",
+    help="generate the mocks listed in the manifest file",
+)
+_parser.add_argument(
+    "--jobs",
+    "-j",
+    type=int,
+    default=1,
+    metavar="N",
+    help="with --batch, generate the mocks in N worker processes; 0 means\n"
+    "one per CPU, default is 1",
+)
+_parser.add_argument(
+    "--watch",
+    action="store_true",
+    help="regenerate the mocks whenever the input header (or any file it\n"
+    "includes) changes, until interrupted",
+)
+_parser.add_argument(
+    "--serve",
+    default=None,
+    metavar="SOCKET",
+    help="serve generation requests on the Unix domain socket SOCKET",
+)
+_parser.add_argument(
+    "--connect",
+    default=None,
+    metavar="SOCKET",
+    help="let the server listening on SOCKET generate the mock",
+)
 _parser.add_argument(
     "--flags", "-f", nargs=argparse.REMAINDER, default=[], help="the C++ compiler flags"
 )
@@ -90,6 +238,28 @@ _parser.add_argument(
 def parse_args(args: list[str]) -> argparse.Namespace:
     args = _parser.parse_args(args)
 
+    if args.serve is not None:
+        if args.input_path is not None or args.batch is not None:
+            _parser.error("positional arguments and --batch are not allowed with --serve")
+        if args.connect is not None or args.watch:
+            _parser.error("--connect and --watch are not allowed with --serve")
+        return args
+    if args.batch is None and (args.input_path is None or args.output_path is None):
+        _parser.error("the following arguments are required: input_path, output_path")
+    if args.batch is not None and args.input_path is not None:
+        _parser.error("input_path and output_path are not allowed with --batch")
+    if args.batch is not None and args.connect is not None:
+        _parser.error("--connect is not allowed with --batch")
+    if args.batch is not None and args.flags:
+        _parser.error("--flags is not allowed with --batch, set them per entry")
+    if args.watch and args.connect is not None:
+        _parser.error("--watch is not allowed with --connect")
+    if args.jobs < 0:
+        _parser.error("--jobs must not be negative")
+
+    # Don't modify the default of --flags in place.
+    args.flags = list(args.flags)
+
     # Apply isysroot default on macOS.
     if sys.platform == "darwin" and "-isysroot" not in args.flags:
         tmp = subprocess.check_output(["xcrun", "--show-sdk-path"])
@@ -109,14 +279,64 @@ def parse_args(args: list[str]) -> argparse.Namespace:
     return args
 
 
+def _parse_batch_entry(args: list[str]) -> argparse.Namespace:
+    result = parse_args(args)
+    if result.batch is not None:
+        _parser.error("nested --batch is not allowed")
+    if result.serve is not None or result.connect is not None or result.watch:
+        _parser.error("--serve, --connect and --watch are not allowed in a batch")
+    _strip_flags(result)
+    return result
+
+
+def _apply_batch_defaults(entry: argparse.Namespace, args: argparse.Namespace) -> None:
+    # Options given next to --batch apply to every entry which doesn't set
+    # them itself.
+    for dest in _BATCH_DEFAULTS:
+        if getattr(entry, dest) == _parser.get_default(dest):
+            setattr(entry, dest, getattr(args, dest))
+
+
+def _strip_flags(args: argparse.Namespace) -> None:
+    # Due to the way that argparse parses args, the need to strip
+    # the first compiler flag of whitespace!
+    if args.flags:
+        args.flags[0] = args.flags[0].lstrip()
+
+
 # This method is the entry point of the drmock-generator script.
 def main() -> None:
     try:
         args = parse_args(sys.argv[1:])
-        # Due to the way that argparse parses args, the need to strip
-        # the first compiler flag of whitespace!
-        if args.flags:
-            args.flags[0] = args.flags[0].lstrip()
+        _strip_flags(args)
+        if args.serve is not None or args.connect is not None:
+            from drmock import server
+        if args.serve is not None:
+            server.serve(args.serve, args.clang_library_file)
+            return
+        if args.connect is not None:
+            server.request(args.connect, args)
+            return
+        if args.batch is not None:
+            entries = batch.read_manifest(args.batch, _parse_batch_entry)
+            for each in entries:
+                if not isinstance(each, batch.InvalidEntry):
+                    _apply_batch_defaults(each, args)
+            if args.watch:
+                from drmock import watch
+
+                # Watching only some of the entries would go unnoticed.
+                for each in entries:
+                    if isinstance(each, batch.InvalidEntry):
+                        raise utils.DrMockRuntimeError(f"{each.location}: {each.error}")
+                watch.watch(entries)
+                return
+            sys.exit(batch.run(entries, args.jobs, args.clang_library_file))
+        if args.watch:
+            from drmock import watch
+
+            watch.watch([args])
+            return
         generator.main(args)
     except utils.DrMockRuntimeError as e:  # FIXME _Don't_ print traceback on clang errors, etc.!
         print(f"drmock-generator: error: {e}\n", file=sys.stderr)
@@ -0,0 +1,237 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Compiler flags from a compilation database (``compile_commands.json``).
+
+Headers are usually not listed in the compilation database, so the
+flags of a header are taken from the _nearest_ translation unit: the
+one whose directory has the longest common path with the directory of
+the header (the first one in the database wins ties). If the header is
+listed, its own entry is used.
+
+The flags are normalized: the compiler (and compiler wrappers such as
+``ccache``), the source file, the output file, the dependency file and
+the PCH options are removed, and relative paths are made absolute. The
+normalized flags are cached per entry, and the result of the lookup per
+directory, so that all headers in a directory get the very same flags.
+This keeps the keys of the PCH and output caches stable.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shlex
+from typing import Any, Optional
+
+from drmock import utils
+
+FILE_NAME = "compile_commands.json"
+
+# Options which are dropped along with their value. A PCH of the build
+# is most likely incompatible with libclang.
+_DROP_WITH_VALUE = {
+    "-o",
+    "-MF",
+    "-MT",
+    "-MQ",
+    "-MJ",
+    "--serialize-diagnostics",
+    "-include-pch",
+}
+# Options which are dropped.
+_DROP = {"-c", "-S", "-E", "-M", "-MM", "-MD", "-MMD", "-MP", "-MG", "-pipe"}
+# Options whose value is a path, given as the next argument.
+_PATH_OPTIONS = {
+    "-I",
+    "-isystem",
+    "-isystem-after",
+    "-iquote",
+    "-idirafter",
+    "-include",
+    "-imacros",
+    "-iframework",
+    "-iframeworkwithsysroot",
+    "-isysroot",
+    "-F",
+    "--sysroot",
+}
+# Options whose value is a path, joined to the option. Longer options
+# come first, so that ``-isystem-afterdir`` isn't read as ``-isystem``.
+_JOINED_PATH_OPTIONS = sorted(
+    (_PATH_OPTIONS - {"--sysroot"}) | {"--sysroot="}, key=len, reverse=True
+)
+# Compiler wrappers which precede the compiler in a compile command.
+_WRAPPERS = {"ccache", "sccache", "distcc", "icecc", "buildcache"}
+_CXX_EXTENSIONS = {".cpp", ".cc", ".cxx", ".c++", ".C", ".mm"}
+
+
+class Database:
+    """A compilation database."""
+
+    def __init__(self, entries: list[dict[str, Any]]) -> None:
+        """Args:
+        entries: The entries of the compilation database
+
+        Raises:
+            utils.DrMockRuntimeError: If an entry is invalid
+        """
+        self._entries = []
+        for each in entries:
+            try:
+                directory = each["directory"]
+                file = os.path.normpath(os.path.join(directory, each["file"]))
+                if "arguments" in each:
+                    arguments = list(each["arguments"])
+                else:
+                    arguments = shlex.split(each["command"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise utils.DrMockRuntimeError(
+                    f"invalid compilation database entry: {e}"
+                )
+            self._entries.append((file, directory, arguments))
+        self._by_file = {}
+        for i, (file, _, _) in enumerate(self._entries):
+            self._by_file.setdefault(file, i)
+        self._flags: dict[int, list[str]] = {}
+        self._by_directory: dict[str, Optional[int]] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> Database:
+        """Load a ``compile_commands.json`` file.
+
+        Raises:
+            utils.DrMockRuntimeError:
+                If reading or parsing the file fails
+        """
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+        except (FileNotFoundError, IOError) as e:
+            raise utils.DrMockRuntimeError(str(e))
+        except ValueError as e:
+            raise utils.DrMockRuntimeError(f"{path}: {e}")
+        if not isinstance(entries, list):
+            raise utils.DrMockRuntimeError(f"{path}: expected a list of entries")
+        return cls(entries)
+
+    def get_flags(self, path: str) -> list[str]:
+        """Return the normalized compiler flags for the file ``path``.
+
+        Returns an empty list if the database is empty.
+        """
+        path = os.path.abspath(path)
+        index = self._by_file.get(path)
+        if index is None:
+            directory = os.path.dirname(path)
+            if directory not in self._by_directory:
+                self._by_directory[directory] = self._find_nearest(directory)
+            index = self._by_directory[directory]
+        if index is None:
+            return []
+        if index not in self._flags:
+            file, directory, arguments = self._entries[index]
+            self._flags[index] = normalize(arguments, directory, file)
+        return list(self._flags[index])
+
+    def _find_nearest(self, directory: str) -> Optional[int]:
+        candidates = [
+            i
+            for i, (file, _, _) in enumerate(self._entries)
+            if os.path.splitext(file)[1] in _CXX_EXTENSIONS
+        ] or range(len(self._entries))
+        best = None
+        best_length = -1
+        for i in candidates:
+            file = self._entries[i][0]
+            length = _common_path_length(directory, os.path.dirname(file))
+            if length > best_length:
+                best, best_length = i, length
+        return best
+
+
+def normalize(arguments: list[str], directory: str, file: str) -> list[str]:
+    """Normalize the arguments of a compile command.
+
+    Args:
+        arguments:
+            The compile command (including the compiler and compiler
+            wrappers like ``ccache``)
+        directory: The working directory of the compile command
+        file: The absolute path of the compiled file
+    """
+    # Skip the compiler wrappers and the compiler.
+    start = 0
+    while start < len(arguments) - 1 and _is_wrapper(arguments[start]):
+        start += 1
+    result = []
+    args = iter(arguments[start + 1 :])
+    for each in args:
+        if each in _DROP_WITH_VALUE:
+            next(args, None)
+            continue
+        if each in _DROP or (each.startswith("-o") and len(each) > 2):
+            continue
+        if os.path.normpath(os.path.join(directory, each)) == file:
+            continue
+        if each in _PATH_OPTIONS:
+            value = next(args, None)
+            if value is not None:
+                result += [each, _absolute(directory, value)]
+            continue
+        for option in _JOINED_PATH_OPTIONS:
+            if each.startswith(option):
+                result.append(option + _absolute(directory, each[len(option) :]))
+                break
+        else:
+            result.append(each)
+    return result
+
+
+def _is_wrapper(argument: str) -> bool:
+    name = os.path.basename(argument)
+    if name.lower().endswith(".exe"):
+        name = name[:-4]
+    return name in _WRAPPERS
+
+
+def _absolute(directory: str, path: str) -> str:
+    return os.path.normpath(os.path.join(directory, path))
+
+
+def _common_path_length(lhs: str, rhs: str) -> int:
+    try:
+        return len(os.path.commonpath([lhs, rhs]))
+    except ValueError:  # Different drives on Windows.
+        return 0
+
+
+_databases: dict[str, tuple[int, Database]] = {}
+
+
+def load(path: str) -> Database:
+    """Load the compilation database ``path``.
+
+    If ``path`` is a directory, ``path/compile_commands.json`` is
+    loaded.
+
+    The database is cached until the file is modified.
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If reading or parsing the file fails
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, FILE_NAME)
+    path = os.path.abspath(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError as e:
+        raise utils.DrMockRuntimeError(str(e))
+    cached = _databases.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    database = Database.from_file(path)
+    _databases[path] = (mtime, database)
+    return database
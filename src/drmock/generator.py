@@ -2,17 +2,27 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-"""The main generator function."""
+"""The main generator function.
+
+``main`` is composed of the public functions ``resolve_flags``,
+``read_input``, ``set_library_file``, ``generate_mocks`` and
+``write_mocks``, which may be used to run the steps separately (as the
+``watch`` module does, to keep the translation unit alive).
+"""
 
 from __future__ import annotations
 
+import copy
 import dataclasses
+import io
 import os
-from typing import Iterable
+import sys
+from typing import Iterable, Optional, Sequence
 
+from drmock import cache
+from drmock import compdb
 from drmock import overload
 from drmock import types
-from drmock import translator
 from drmock import utils
 
 MOCK_OBJECT_PREFIX = "DRMOCK_OBJECT"
@@ -22,41 +32,143 @@ INCLUDE_GUARD_PREFIX = "DRMOCK_MOCK_IMPLEMENTATIONS"
 DRMOCK_INCLUDE_PATH = "DrMock/"
 MACRO_PREFIX = "DRMOCK_"
 FORWARDING_CTOR_TEMPLATE_PARAMS = MACRO_PREFIX + "FORWARDING_CTOR_TS"
+# Macros that are hidden from the preprocessor (see
+# ``_hide_macros_from_preprocessor``).
+HIDDEN_MACROS = {"Q_OBJECT"}
 
 
-def main(args) -> None:
+def main(args) -> list[str]:
     """Generate mock files and save them on disk.
 
     Args:
         args: Holds the commandline arguments
 
+    Returns:
+        The paths of the files which were actually written
+
     The ``args`` parameter is required to have the fields specified in
     the documentation of the ``commandline`` module.
 
+    Files whose content is unchanged are not touched. All other files
+    are written atomically.
+
     Raises:
         utils.DrMockRuntimeError:
             If reading/writing any of the specified files fails
     """
+    args = resolve_flags(args)
+    old_header = read_input(args)
+
+    if args.cache_dir:
+        mock_cache = cache.Cache(args.cache_dir)
+        key = cache.get_key(args, old_header, HIDDEN_MACROS)
+        cached = mock_cache.load(key, lambda name: _get_output_path(args, name))
+    else:
+        cached = None
+
+    if cached is not None:
+        mocks, dependencies = cached
+        # The output paths are not part of the key, so they may collide
+        # even though they didn't when the entry was stored.
+        for i, (class_name, output_path, _, _) in enumerate(mocks):
+            _check_output_path(mocks[:i], class_name, output_path)
+        _report(args, f"{args.input_path}: cache hit")
+    else:
+        mocks, dependencies = _main_impl(args, old_header)
+        if args.cache_dir:
+            mock_cache.store(key, mocks, dependencies)
+
+    return write_mocks(args, mocks, dependencies)
+
+
+def resolve_flags(args):
+    """Return a copy of ``args`` whose flags are preceded by the flags
+    from the compilation database (if any).
+
+    Raises:
+        utils.DrMockRuntimeError: If loading the compilation database fails
+    """
+    if not args.compile_commands:
+        return args
+    database = compdb.load(args.compile_commands)
+    args = copy.copy(args)  # Don't modify the caller's args.
+    args.flags = database.get_flags(args.input_path) + args.flags
+    return args
+
+
+def read_input(args) -> str:
+    """Read the input header and hide the ``HIDDEN_MACROS``.
+
+    Raises:
+        utils.DrMockRuntimeError: If reading the input header fails
+    """
     try:
         with open(args.input_path, "r") as f:
-            old_header = f.read()
+            result = f.read()
     except (FileNotFoundError, IOError) as e:
         raise utils.DrMockRuntimeError(str(e))
+    return _hide_macros_from_preprocessor(result, HIDDEN_MACROS)
 
-    macros = {"Q_OBJECT"}
-    old_header = _hide_macros_from_preprocessor(old_header, macros)
-    new_header, new_source = _main_impl(args, old_header)
 
-    output_path_header = args.output_path
-    without_extension, _ = os.path.splitext(output_path_header)
-    output_path_source = without_extension + ".cpp"
-    try:
-        with open(output_path_header, "w") as f:
-            f.write(new_header)
-        with open(output_path_source, "w") as f:
-            f.write(new_source)
-    except IOError as e:
-        raise utils.DrMockRuntimeError(str(e))
+def write_mocks(
+    args, mocks: Sequence[cache.Mock], dependencies: Sequence[str]
+) -> list[str]:
+    """Write the mock files (and depfiles) whose content changed.
+
+    Args:
+        args: Holds the commandline arguments
+        mocks: The mocks, as returned by ``generate_mocks``
+        dependencies: The files included by the input header
+
+    Returns:
+        The paths of the files which were actually written
+
+    Raises:
+        utils.DrMockRuntimeError: If writing any of the files fails
+    """
+    updated = []
+    for _, output_path_header, new_header, new_source in mocks:
+        without_extension, _ = os.path.splitext(output_path_header)
+        output_path_source = without_extension + ".cpp"
+        outputs = [
+            (output_path_header, new_header),
+            (output_path_source, new_source),
+        ]
+        if args.depfile:
+            depfile = _generate_depfile(
+                [output_path_header, output_path_source],
+                [os.path.abspath(args.input_path)] + list(dependencies),
+            )
+            outputs.append((without_extension + ".d", depfile))
+        updated += [
+            path for path, content in outputs if utils.write_if_changed(path, content)
+        ]
+    if updated:
+        _report(args, f"{args.input_path}: updated {', '.join(updated)}")
+    else:
+        _report(args, f"{args.input_path}: output unchanged")
+    return updated
+
+
+def _generate_depfile(targets: list[str], dependencies: list[str]) -> str:
+    """Generate a Makefile/Ninja depfile.
+
+    Args:
+        targets: The generated files
+        dependencies: The files which the targets depend on
+    """
+    lines = [" ".join(_escape_depfile_path(each) for each in targets) + ":"]
+    lines += [" " + _escape_depfile_path(each) for each in dependencies]
+    return " \\\n".join(lines) + "\n"
+
+
+def _escape_depfile_path(path: str) -> str:
+    # Make and Ninja treat backslashes as escape characters, but accept
+    # forward slashes on Windows.
+    path = path.replace("\\", "/")
+    for char in " #":
+        path = path.replace(char, "\\" + char)
+    return path.replace("$", "$$")
 
 
 def _hide_macros_from_preprocessor(source: str, macros: Iterable[str]) -> str:
@@ -73,7 +185,7 @@ def _hide_macros_from_preprocessor(source: str, macros: Iterable[str]) -> str:
     return source
 
 
-def _main_impl(args: str, input_header: str) -> tuple[str, str]:
+def _main_impl(args: str, input_header: str) -> tuple[list[cache.Mock], list[str]]:
     """Generate mock header and source code.
 
     Args:
@@ -81,7 +193,10 @@ def _main_impl(args: str, input_header: str) -> tuple[str, str]:
         input_header: The header of the C++ .h to mock
 
     Returns:
-        A tuple which holds the header and source code of the mock class
+        The name of the mocked class, the path of the mock header, and
+        the header and source code of the mock class for the first
+        matching class (or every matching class, if ``args.all_classes``
+        is set), and the files included by ``input_header``
 
     Raises:
         utils.DrMockRuntimeError:
@@ -89,6 +204,51 @@ def _main_impl(args: str, input_header: str) -> tuple[str, str]:
         utils.DrMockRuntimeError:
             If no class matching the pattern provided by ``args`` is
             found in ``input_header``
+        utils.DrMockRuntimeError:
+            If the output paths of two matching classes are equal
+    """
+    set_library_file(args)
+    from drmock import pch
+    from drmock import translator
+
+    if args.single_file:
+        root = translator.translate(
+            args.input_path,
+            input_header,
+            args.flags,
+            profile=args.parse_profile,
+            single_file=True,
+        )
+        try:
+            result = generate_mocks(args, root, check_errors=True)
+        except utils.DrMockRuntimeError as e:
+            _report(
+                args,
+                f"{args.input_path}: single file parse failed, falling back to full"
+                f" parse: {e}",
+            )
+        else:
+            _report(args, f"{args.input_path}: parsed single file")
+            return result
+
+    pch_cache = pch.Cache(args.pch_cache) if args.pch_cache else None
+    root = translator.translate(
+        args.input_path,
+        input_header,
+        args.flags,
+        pch_cache=pch_cache,
+        profile=args.parse_profile,
+    )
+    _report(args, f"{args.input_path}: parsed using profile '{args.parse_profile}'")
+    return generate_mocks(args, root)
+
+
+def set_library_file(args) -> None:
+    """Load libclang from ``args.clang_library_file``.
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If the clang library file is not set
     """
     if not args.clang_library_file:
         raise utils.DrMockRuntimeError(
@@ -97,38 +257,173 @@ def _main_impl(args: str, input_header: str) -> tuple[str, str]:
             " argument or by setting the environment variable"
             " CLANG_LIBRARY_FILE."
         )
+    # Import the modules which depend on ``clang.cindex`` only if
+    # parsing is actually required.
+    from drmock import translator
+
     translator.set_library_file(args.clang_library_file)
-    root = translator.translate(args.input_path, input_header, args.flags)
-    node, enclosing_namespace = root.find_matching_class(args.input_class)
-    if node is None:
+
+
+def generate_mocks(
+    args, root, check_errors: bool = False
+) -> tuple[list[cache.Mock], list[str]]:
+    """Generate the mocks of the classes in ``root`` selected by ``args``.
+
+    Args:
+        args: Holds the commandline arguments
+        root: The root node of the translated input header
+        check_errors:
+            Check the selected classes for errors (required if ``root``
+            is the result of a single file parse)
+
+    Returns:
+        See ``_main_impl``
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If no class matches, if ``check_errors`` is set and clang
+            reported errors in one of the selected classes, or if the
+            output paths of two classes are equal
+    """
+    from drmock import translator
+
+    if args.all_classes:
+        matches = root.find_matching_classes(args.input_class)
+    else:
+        node, enclosing_namespace = root.find_matching_class(args.input_class)
+        matches = [(node, enclosing_namespace)] if node is not None else []
+    if not matches:
         raise utils.DrMockRuntimeError(
             f"No class matching '{args.input_class}' found in {args.input_path}"
         )
 
-    class_ = types.Class.from_node(node)
-    class_.enclosing_namespace = enclosing_namespace
+    result = []
+    for node, enclosing_namespace in matches:
+        errors = translator.get_errors(node) if check_errors else []
+        if errors:
+            raise utils.DrMockRuntimeError(
+                f"Errors in class '{node.cursor.spelling}':\n\n"
+                + "\n".join("\t" + each for each in errors)
+            )
+        class_ = types.Class.from_node(node)
+        class_.enclosing_namespace = enclosing_namespace
+        output_path = _get_output_path(args, class_.name)
+        _check_output_path(result, class_.name, output_path)
+        new_header, new_source = _generate_mock(args, class_, output_path)
+        result.append((class_.name, output_path, new_header, new_source))
+    return result, translator.get_included_files(root)
+
+
+def _check_output_path(
+    mocks: Sequence[cache.Mock], class_name: str, output_path: str
+) -> None:
+    """Check that none of ``mocks`` is written to ``output_path``.
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If one of ``mocks`` has the output path ``output_path``
+    """
+    for other, other_output_path, _, _ in mocks:
+        if output_path == other_output_path:
+            raise utils.DrMockRuntimeError(
+                f"Classes '{other}' and '{class_name}' would both be mocked in"
+                f" {output_path}; use the backreference \\1 in the output path"
+            )
+
+
+def _generate_mock(args, class_: types.Class, output_path: str) -> tuple[str, str]:
+    """Generate the header and source code of the mock of ``class_``.
 
+    Args:
+        args: Holds the commandline arguments
+        class_: The mocked class
+        output_path: The path of the mock header
+    """
     mock_implementation_name = utils.swap(
         args.input_class, args.output_class, class_.name
     )
 
+    analysis = _analyze(class_, args.access)
     mock_object = _generate_mock_object(
-        class_, args.access, args.namespace, args.controller
+        class_, analysis, args.namespace, args.controller
     )
     mock_implementation = _generate_mock_implementation(
-        mock_implementation_name, class_, args.access, args.namespace
+        mock_implementation_name, class_, analysis, args.namespace
     )
 
     new_header = _generate_header(
-        class_, mock_object, mock_implementation, args.input_path
+        class_, analysis, mock_object, mock_implementation, args.input_path
     )
-    new_source = _generate_source(class_, args.output_path)
+    new_source = _generate_source(analysis, output_path)
 
     return new_header, new_source
 
 
+def _get_output_path(args, class_name: str) -> str:
+    """Return the path of the mock header of the class ``class_name``.
+
+    If ``args.all_classes`` is set, the output path may contain a
+    backreference (\\1) to a capture group in the input class.
+    """
+    if not args.all_classes:
+        return args.output_path
+    try:
+        return utils.swap(args.input_class, args.output_path, class_name)
+    except IndexError:
+        raise utils.DrMockRuntimeError(
+            f"The output path {args.output_path} contains a backreference, but"
+            f" the input class '{args.input_class}' has no capture group"
+        )
+
+
+def _report(args, message: str) -> None:
+    """Print ``message`` if ``args`` requests verbose output."""
+    if args.verbose:
+        print(f"drmock-generator: {message}", file=sys.stdout)
+
+
+@dataclasses.dataclass
+class _Analysis:
+    """The properties of a mocked class which are used by more than one
+    part of the mock.
+
+    Attributes:
+        virtual_methods: The virtual methods of the class
+        overloads: The overloads of the mocked methods
+        explicit_instantiations:
+            The ``drmock::Method`` templates to explicitly instantiate
+            (without duplicates), or ``None`` if explicit instantiation
+            isn't allowed
+    """
+
+    virtual_methods: list[types.Method]
+    overloads: list[overload.Overload]
+    explicit_instantiations: Optional[list[str]]
+
+
+def _analyze(class_: types.Class, access: list[str]) -> _Analysis:
+    """Analyze the mocked class ``class_``.
+
+    Args:
+        class_: The mocked class
+        access: Only mock methods with these access specifiers
+    """
+    virtual_methods = class_.get_virtual_methods()
+    overloads = overload.get_overloads_of_class(class_, access, virtual_methods)
+    explicit_instantiations = None
+    if class_.explicit_instantiation_allowed():
+        # Discard duplicates (which occur if methods have cv-qualified
+        # overloads with the same signature, for example).
+        parent = class_.full_name()
+        explicit_instantiations = utils.filter_duplicates(
+            [_generate_method_template(parent, each) for each in virtual_methods]
+        )
+    return _Analysis(virtual_methods, overloads, explicit_instantiations)
+
+
 def _generate_header(
     class_: types.Class,
+    analysis: _Analysis,
     mock_object: types.Class,
     mock_implementation: types.Class,
     input_path: str,
@@ -137,71 +432,58 @@ def _generate_header(
 
     Args:
         class_: The mocked class
+        analysis: The analysis of the mocked class
         mock_object: The mock object class
         mock_implementation: The mock implementation class
         input_path:
             Absolute or relative path to the mocked class' .h file
     """
-    result = ""
+    buffer = io.StringIO()
+    emitter = utils.Emitter(buffer)
 
-    result += _include_guard_open(class_.name)
-    result += "\n"
+    emitter.write(_include_guard_open(class_.name))
+    emitter.write("\n")
 
-    result += "#define DRMOCK\n"
-    result += _include_angled_brackets(DRMOCK_INCLUDE_PATH + "Mock.h")
-    result += _include_quotes(os.path.abspath(input_path))
-    result += "\n"
+    emitter.write("#define DRMOCK\n")
+    emitter.write(_include_angled_brackets(DRMOCK_INCLUDE_PATH + "Mock.h"))
+    emitter.write(_include_quotes(os.path.abspath(input_path)))
+    emitter.write("\n")
 
     # If explicit instantiations are allowed, declare them in the .h and
     # define them in the .cpp.
-    if class_.explicit_instantiation_allowed():
-        # Discard duplicates (which occur if methods have cv-qualified
-        # overloads with the same signature, for example).
-        method_templates = utils.filter_duplicates(
-            [
-                _generate_method_template(class_.full_name(), each)
-                for each in class_.get_virtual_methods()
-            ]
-        )
-        result += "\n".join(
-            _explicit_instantiation_decl(each) for each in method_templates
-        )
-        result += "\n"
+    if analysis.explicit_instantiations is not None:
+        for i, each in enumerate(analysis.explicit_instantiations):
+            emitter.write(bool(i) * "\n" + _explicit_instantiation_decl(each))
+        emitter.write("\n")
 
-    result += str(mock_object)
-    result += "\n"
-    result += "\n"
-    result += str(mock_implementation)
-    result += "\n"
-    result += "\n"
-    result += _include_guard_close(class_.name)
+    mock_object.emit(emitter)
+    emitter.write("\n")
+    emitter.write("\n")
+    mock_implementation.emit(emitter)
+    emitter.write("\n")
+    emitter.write("\n")
+    emitter.write(_include_guard_close(class_.name))
 
-    return result
+    return buffer.getvalue()
 
 
-def _generate_source(class_: types.Class, header_path: str) -> str:
+def _generate_source(analysis: _Analysis, header_path: str) -> str:
     """Generate mock implementation source code.
 
     Args:
-        class_:
-            The mocked class (not the mock object/implementation class!)
+        analysis:
+            The analysis of the mocked class (not the mock
+            object/implementation class!)
         input_path:
             Absolute path to the mock object/implementation .h file
     """
     result = ""
-    if class_.explicit_instantiation_allowed():
-        # Discard duplicates (which occur if methods have cv-qualified
-        # overloads with the same signature, for example).
-        method_templates = utils.filter_duplicates(
-            [
-                _generate_method_template(class_.full_name(), each)
-                for each in class_.get_virtual_methods()
-            ]
-        )
+    if analysis.explicit_instantiations is not None:
         result += _include_quotes(header_path)
         result += "\n"
         result += "\n".join(
-            _explicit_instantiation_definition(each) for each in method_templates
+            _explicit_instantiation_definition(each)
+            for each in analysis.explicit_instantiations
         )
     else:
         result = "// This source file is intentionally left blank"  # To prevent AutoGen warnings.
@@ -209,14 +491,14 @@ def _generate_source(class_: types.Class, header_path: str) -> str:
 
 
 def _generate_mock_object(
-    class_: types.Class, access: list[str], namespace: str, controller: str
+    class_: types.Class, analysis: _Analysis, namespace: str, controller: str
 ) -> types.Class:
     """Generate the ``types.Class`` object of the mock object.
 
     Args:
         class_:
             The mocked class (not the mock object/implementation class!)
-        access: Only mock methods with these access specifiers
+        analysis: The analysis of ``class_``
         namespace:
             The absolute or relative enclosing namespace for the mock
             object/implementation class
@@ -226,7 +508,7 @@ def _generate_mock_object(
     result = types.Class(_generate_mock_object_class_name(class_))
     result.enclosing_namespace = _generate_enclosing_namespace(class_, namespace)
     result.template = class_.template
-    overloads = overload.get_overloads_of_class(class_, access)
+    overloads = analysis.overloads
 
     type_aliases = class_.get_type_aliases()
     for each in type_aliases:
@@ -271,7 +553,7 @@ def _generate_mock_object(
 
 
 def _generate_mock_implementation(
-    name: str, class_: types.Class, access: list[str], namespace: str
+    name: str, class_: types.Class, analysis: _Analysis, namespace: str
 ) -> types.Class:
     """Generate the ``types.Class`` object of the mock implementation.
 
@@ -279,7 +561,7 @@ def _generate_mock_implementation(
         name: The name of the mock implementation class
         class_:
             The mocked class (not the mock object/implementation class!)
-        access: Only mock methods with these access specifiers
+        analysis: The analysis of ``class_``
         namespace:
             The absolute or relative enclosing namespace for the mock
             object/implementation class
@@ -294,7 +576,7 @@ def _generate_mock_implementation(
     result.members = class_.get_type_aliases()
 
     # Set the class as parent for all methods.
-    overloads = overload.get_overloads_of_class(class_, access)
+    overloads = analysis.overloads
     default_ctor = types.Constructor(
         name=name,
         template=types.TemplateDecl([f"... {FORWARDING_CTOR_TEMPLATE_PARAMS}"]),
@@ -367,7 +649,8 @@ def _explicit_instantiation_definition(expr: str) -> str:
     return "template class " + expr + ";"
 
 
-@dataclasses.dataclass
+@utils.add_slots
+@dataclasses.dataclass(frozen=True)
 class Friend:
     name: str
     access: str = "public"
@@ -8,7 +8,7 @@ from __future__ import annotations
 
 import copy
 import dataclasses
-from typing import Iterator, Sequence
+from typing import Iterator, Optional, Sequence
 
 from drmock import types
 from drmock import utils
@@ -28,22 +28,26 @@ DISPATCH_PREFIX = "DRMOCK_DISPATCH"
 
 
 def get_overloads_of_class(
-    class_: types.Class, access_specs: Iterator[str] = None
+    class_: types.Class,
+    access_specs: Iterator[str] = None,
+    virtual_methods: Optional[Sequence[types.Method]] = None,
 ) -> list[Overload]:
     """Group method of ``class_`` into ``Overload`` objects.
 
     Args:
         class_: The class whose methods are grouped
         acccess_specs: Only group method with these access specifiers
+        virtual_methods:
+            The virtual methods of ``class_``, if they're already known
 
     Returns:
         A list with the ``Overload`` objects
     """
     if not access_specs:
         access_specs = ["public"]
-    virtual_methods = [
-        each for each in class_.get_virtual_methods() if each.access in access_specs
-    ]
+    if virtual_methods is None:
+        virtual_methods = class_.get_virtual_methods()
+    virtual_methods = [each for each in virtual_methods if each.access in access_specs]
     collections = utils.split_by_condition(lambda f: f.mangled_name(), virtual_methods)
     return [Overload(class_, each) for each in collections]
 
@@ -57,6 +61,12 @@ class Overload:
     def __init__(self, parent: types.Class, methods: Sequence[types.Method]) -> None:
         self._parent = parent
         self._methods = methods
+        # As ``types.Type`` objects are hashable, the signatures of the
+        # methods may be compared by their (hashable) keys.
+        self._same_params = len({tuple(each.params) for each in methods}) <= 1
+        self._same_qualifiers = (
+            len({(each.const, each.lvalue, each.rvalue) for each in methods}) <= 1
+        )
 
     def generate_getter(self) -> types.Method:
         """Generate the overload's template getter method."""
@@ -73,7 +83,7 @@ class Overload:
         if (
             self._all_same_params()
         ):  # Not overloaded or the only difference is cv-qualifiers!
-            dispatch += copy.deepcopy(f.params)
+            dispatch += f.params
         if self._overloaded():
             # If the overloads differ in their params, then the
             # PARAMETER_PACK serves as leading part of the
@@ -133,7 +143,7 @@ class Overload:
             # The method's cv qualifiers are stored in the type
             # container's template args, together with the types of the
             # params of ``f``.
-            template_args = copy.deepcopy(f.params)
+            template_args = list(f.params)
             if f.const:
                 template_args.append(types.Type(CONST_ENUM))
             if f.volatile:
@@ -204,16 +214,10 @@ class Overload:
 
     def _all_same_params(self) -> bool:
         """Check if all overloads differ only by qualifier."""
-        params = self._methods[0].params
-        return all(elem.params == params for elem in self._methods)
+        return self._same_params
 
     def _all_same_qualifiers(self) -> bool:
-        f = self._methods[0]
-        qualifiers = (f.const, f.lvalue, f.rvalue)
-        return all(
-            (elem.const, elem.lvalue, elem.rvalue) == qualifiers
-            for elem in self._methods
-        )
+        return self._same_qualifiers
 
     def _generate_access(self, f: types.Method) -> str:
         """Return code for accessing method ptr from mock object.
@@ -227,7 +231,7 @@ class Overload:
         if self._overloaded():
             template_args = []
             if not self._all_same_params():
-                template_args += copy.deepcopy(f.params)
+                template_args += f.params
             if not self._all_same_qualifiers():
                 if f.const:
                     template_args.append(CONST_ENUM)
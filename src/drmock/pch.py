@@ -0,0 +1,210 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Cache for precompiled headers (PCH).
+
+Most headers start with a block of ``#include <...>`` directives of
+system and framework headers (the _include prefix_). The ``Cache``
+precompiles the include prefix once for each set of compiler flags and
+stores the PCH in a cache directory. The PCH file is keyed by the
+include prefix, the compiler flags, the working directory and the
+libclang version. The files which the PCH depends on are stored next to
+it (see ``Cache.get_dependencies``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from typing import Optional
+
+import clang.cindex
+
+from drmock import utils
+
+PREFIX_FILE_NAME = "drmock_pch_prefix.h"
+DEPENDENCIES_SUFFIX = ".deps.json"
+REJECTED_SUFFIX = ".rejected.json"
+
+_INCLUDE_ANGLED = re.compile(r"\s*#\s*include\s*<[^>]*>\s*$")
+_INCLUDE_GUARD_OPEN = re.compile(r"\s*#\s*ifndef\s+(\w+)\s*$")
+_DEFINE = re.compile(r"\s*#\s*define\s+(\w+)\s*$")
+_PRAGMA_ONCE = re.compile(r"\s*#\s*pragma\s+once\s*$")
+
+
+def get_include_prefix(source: str) -> list[str]:
+    """Return the ``#include <...>`` directives at the top of ``source``.
+
+    The prefix ends at the first line which is neither blank, nor a
+    comment, nor an angled include directive, nor part of an include
+    guard or ``#pragma once``. (Any other directive may change the
+    meaning of the includes that follow it.)
+    """
+    result = []
+    guard = None
+    in_comment = False
+    for line in source.splitlines():
+        stripped = line.strip()
+        if in_comment:
+            in_comment = "*/" not in stripped
+            continue
+        if not stripped or stripped.startswith("//"):
+            continue
+        if stripped.startswith("/*"):
+            in_comment = "*/" not in stripped
+            continue
+        if _INCLUDE_ANGLED.match(line):
+            result.append(stripped)
+            continue
+        if _PRAGMA_ONCE.match(line):
+            continue
+        match = _INCLUDE_GUARD_OPEN.match(line)
+        if match and guard is None and not result:
+            guard = match.group(1)
+            continue
+        match = _DEFINE.match(line)
+        if match and match.group(1) == guard:
+            continue
+        break
+    return result
+
+
+class Cache:
+    """Directory of precompiled include prefixes."""
+
+    def __init__(self, directory: str) -> None:
+        """Args:
+        directory: The cache directory (created if necessary)
+        """
+        self._directory = directory
+
+    def get(
+        self, index: clang.cindex.Index, compiler_flags: list[str], source: str
+    ) -> Optional[str]:
+        """Return the path to the PCH of the include prefix of ``source``.
+
+        If the PCH isn't cached yet, it's built using ``index``.
+
+        Args:
+            index: The index used for building the PCH
+            compiler_flags: The compiler flags used for parsing ``source``
+            source: The C++ source
+
+        Returns:
+            The path to the PCH file, or ``None`` if ``source`` has no
+            include prefix or if building the PCH fails
+        """
+        prefix = get_include_prefix(source)
+        if not prefix:
+            return None
+
+        path = os.path.join(self._directory, self._key(compiler_flags, prefix) + ".pch")
+        if os.path.isfile(path):
+            return path
+        if self._is_rejected(path):
+            return None
+
+        prefix_source = "\n".join(prefix) + "\n"
+        try:
+            tu = index.parse(
+                PREFIX_FILE_NAME,
+                ["-x", "c++-header"] + compiler_flags,
+                unsaved_files=[(PREFIX_FILE_NAME, prefix_source)],
+            )
+        except clang.cindex.TranslationUnitLoadError:
+            return None
+        if tu.diagnostics:
+            return None
+
+        # Save under a temporary name first so that concurrent processes
+        # never see a half-written PCH. The dependencies are saved first,
+        # so that they're available whenever the PCH is.
+        dependencies = sorted(
+            {os.path.abspath(each.include.name) for each in tu.get_includes()}
+        )
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            utils.write_atomic(path + DEPENDENCIES_SUFFIX, json.dumps(dependencies))
+            tu.save(tmp)
+            os.replace(tmp, path)
+        except (
+            clang.cindex.TranslationUnitSaveError,
+            OSError,
+            utils.DrMockRuntimeError,
+        ):
+            return None
+        return path
+
+    def get_dependencies(self, path: str) -> list[str]:
+        """Return the absolute paths of the files included by the PCH
+        ``path``, or an empty list if they are unknown."""
+        try:
+            with open(path + DEPENDENCIES_SUFFIX, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def discard(self, path: str) -> None:
+        """Remove a (stale or broken) PCH file from the cache."""
+        for each in [path, path + DEPENDENCIES_SUFFIX]:
+            try:
+                os.remove(each)
+            except OSError:
+                pass
+
+    def reject(self, path: str) -> None:
+        """Remove the PCH file ``path`` from the cache and don't build it
+        again until one of the files it depends on is modified.
+
+        Used for PCHs which are valid, but break the parse of the
+        sources that use them (for example, if a header of the include
+        prefix has no include guard).
+        """
+        dependencies = [
+            [each, _get_mtime(each)] for each in self.get_dependencies(path)
+        ]
+        try:
+            utils.write_atomic(path + REJECTED_SUFFIX, json.dumps(dependencies))
+        except utils.DrMockRuntimeError:
+            pass  # Just try again next time.
+        self.discard(path)
+
+    def _is_rejected(self, path: str) -> bool:
+        """Check if the PCH ``path`` was rejected and none of its
+        dependencies has been modified since."""
+        try:
+            with open(path + REJECTED_SUFFIX, "r") as f:
+                dependencies = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if all(_get_mtime(each) == mtime for each, mtime in dependencies):
+            return True
+        try:
+            os.remove(path + REJECTED_SUFFIX)
+        except OSError:
+            pass
+        return False
+
+    def _key(self, compiler_flags: list[str], prefix: list[str]) -> str:
+        data = json.dumps([compiler_flags, prefix, os.getcwd(), _libclang_version()])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _get_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _libclang_version() -> str:
+    # ``clang_getClangVersion`` is not registered by ``clang.cindex``, so
+    # we're setting the result type by hand.
+    func = clang.cindex.conf.lib.clang_getClangVersion
+    func.restype = clang.cindex._CXString
+    func.errcheck = clang.cindex._CXString.from_result
+    return func()
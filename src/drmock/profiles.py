@@ -0,0 +1,25 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Parse profiles, i.e. named sets of options for libclang's parser.
+
+This module doesn't import ``clang.cindex``, so that the commandline
+client may offer the profiles without loading libclang.
+"""
+
+# See ``CXTranslationUnit_Flags`` in libclang's ``Index.h``.
+PARSE_NONE = 0x0
+PARSE_INCOMPLETE = 0x2
+PARSE_SKIP_FUNCTION_BODIES = 0x40
+PARSE_KEEP_GOING = 0x200
+
+# The ``fast`` profile skips everything that ``types.Class.from_node``
+# doesn't need: function bodies are not parsed, and the translation unit
+# is marked as incomplete, so that no implicit template instantiations
+# are performed at its end.
+PARSE_PROFILES = {
+    "default": PARSE_NONE,
+    "fast": PARSE_SKIP_FUNCTION_BODIES | PARSE_INCOMPLETE | PARSE_KEEP_GOING,
+}
+DEFAULT_PARSE_PROFILE = "default"
@@ -0,0 +1,98 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Plain records of the info on AST nodes.
+
+The records are filled by the ``translator.extract_XXX`` functions and
+turned into ``types`` objects by their ``from_record`` methods. This
+module doesn't import ``clang.cindex``.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+from typing import Optional, Union
+
+
+@dataclasses.dataclass
+class ParamRecord:
+    """Info on a ``PARM_DECL`` cursor.
+
+    Attributes:
+        spelling: The parameter's name (empty if unnamed)
+        tokens: The cursor's tokens
+        const: Indicates if the (outer) type is const-qualified
+        volatile: Indicates if the (outer) type is volatile-qualified
+    """
+
+    spelling: str
+    tokens: list[str]
+    const: bool = False
+    volatile: bool = False
+
+
+@dataclasses.dataclass
+class MethodRecord:
+    """Info on a ``CXX_METHOD`` cursor.
+
+    Attributes:
+        spelling: The method's name
+        tokens: The cursor's tokens
+        params: The method's parameters
+        const: Indicates if the method is const-qualified
+        virtual: Indicates if the method is virtual
+        pure_virtual: Indicates if the method is pure virtual
+        noexcept: Indicates if the method has a basic ``noexcept`` spec
+        access: The access specifier in effect for the method
+    """
+
+    spelling: str
+    tokens: list[str]
+    params: list[ParamRecord] = dataclasses.field(default_factory=list)
+    const: bool = False
+    virtual: bool = False
+    pure_virtual: bool = False
+    noexcept: bool = False
+    access: str = "public"
+
+
+@dataclasses.dataclass
+class TypeAliasRecord:
+    """Info on a ``TYPE_ALIAS_DECL`` or ``TYPE_ALIAS_TEMPLATE_DECL``
+    cursor.
+
+    Attributes:
+        spelling: The alias
+        underlying_type: The spelling of the aliased type
+        template_params:
+            The tokens of each template type parameter, or ``None`` if
+            the alias is not a template
+        access: The access specifier in effect for the alias
+    """
+
+    spelling: str
+    underlying_type: str
+    template_params: Optional[list[list[str]]] = None
+    access: str = "public"
+
+
+@dataclasses.dataclass
+class ClassRecord:
+    """Info on a ``CLASS_DECL`` or ``CLASS_TEMPLATE`` cursor.
+
+    Attributes:
+        spelling: The class name
+        template_params:
+            The tokens of each template type parameter, or ``None`` if
+            the class is not a template
+        q_object: Indicates if the class is a ``Q_OBJECT``
+        members: The methods and type aliases of the class
+    """
+
+    spelling: str
+    template_params: Optional[list[list[str]]] = None
+    q_object: bool = False
+    members: list[Union[MethodRecord, TypeAliasRecord]] = dataclasses.field(
+        default_factory=list
+    )
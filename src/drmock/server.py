@@ -0,0 +1,183 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Generator daemon which serves requests over a Unix domain socket.
+
+Starting ``drmock-generator`` for every header means paying for the
+Python interpreter startup, the import of ``clang.cindex`` and loading
+libclang over and over again. ``serve`` does all of this once and then
+forks a worker process for every request, so that requests are handled
+concurrently and never share any state (in particular, the working
+directory of the client).
+
+The protocol is a single JSON object per connection, in each direction.
+The client sends ``{"cwd": ..., "args": ...}``, where ``args`` holds the
+fields of the namespace returned by ``commandline.parse_args``. The
+server responds with ``{"updated": ..., "stdout": ...}`` on success, or
+``{"error": ..., "stdout": ...}`` on failure.
+
+The socket is only accessible by the user running the server. The
+server is not available on platforms without ``fork`` and Unix domain
+sockets (i.e. Windows).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+from typing import Any, Optional
+
+from drmock import generator
+from drmock import utils
+
+_SUPPORTED = hasattr(socketserver, "ForkingMixIn") and hasattr(socket, "AF_UNIX")
+
+
+def serve(socket_path: str, clang_library_file: Optional[str]) -> None:
+    """Serve generator requests on ``socket_path`` until interrupted.
+
+    Args:
+        socket_path: The path of the Unix domain socket
+        clang_library_file: The libclang to preload
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If the server is not supported on this platform, if the
+            clang library file is not set or if the socket is already in
+            use
+    """
+    _check_supported()
+    if not clang_library_file:
+        raise utils.DrMockRuntimeError(
+            "clang library file path not set. The server requires"
+            " --clang-library-file or the environment variable"
+            " CLANG_LIBRARY_FILE."
+        )
+    import clang.cindex
+    from drmock import translator
+
+    translator.set_library_file(clang_library_file)
+    clang.cindex.conf.lib  # Force libclang to load _before_ forking.
+
+    _remove_stale_socket(socket_path)
+    try:
+        server = _Server(socket_path, _Handler)
+    except OSError as e:
+        raise utils.DrMockRuntimeError(f"failed to listen on {socket_path}: {e}")
+    server.clang_library_file = clang_library_file
+    print(f"drmock-generator: listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(OSError):
+            os.remove(socket_path)
+
+
+def request(socket_path: str, args: argparse.Namespace) -> list[str]:
+    """Let the server at ``socket_path`` generate the mock for ``args``.
+
+    The output of the server is printed on ``stdout``.
+
+    Returns:
+        The paths of the files which were actually written
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If the server is not supported on this platform, if
+            connecting to the server fails or if the server reports an
+            error
+    """
+    _check_supported()
+    message = {"cwd": os.getcwd(), "args": vars(args)}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile("rb") as f:
+                data = f.read()
+    except OSError as e:
+        raise utils.DrMockRuntimeError(
+            f"failed to connect to server at {socket_path}: {e}"
+        )
+    try:
+        response = json.loads(data)
+    except ValueError:
+        raise utils.DrMockRuntimeError(
+            f"invalid response from server at {socket_path}"
+        )
+    sys.stdout.write(response.get("stdout", ""))
+    if "error" in response:
+        raise utils.DrMockRuntimeError(response["error"])
+    return response["updated"]
+
+
+def _check_supported() -> None:
+    if not _SUPPORTED:
+        raise utils.DrMockRuntimeError(
+            "--serve/--connect are not supported on this platform"
+        )
+
+
+if _SUPPORTED:
+
+    class _Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+        clang_library_file: str
+
+        def server_bind(self) -> None:
+            super().server_bind()
+            # Other users must not be able to connect, as the server writes
+            # files in any directory the client chooses. The server doesn't
+            # listen yet, so no connection is accepted before this.
+            os.chmod(self.server_address, 0o600)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        stdout = io.StringIO()
+        try:
+            message = json.loads(self.rfile.readline())
+            with contextlib.redirect_stdout(stdout):
+                response = {"updated": self._generate(message)}
+        except utils.DrMockRuntimeError as e:
+            response = {"error": str(e)}
+        except Exception as e:  # Don't let the client wait for nothing.
+            traceback.print_exc()
+            response = {"error": f"internal server error: {e!r}"}
+        response["stdout"] = stdout.getvalue()
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    def _generate(self, message: dict[str, Any]) -> list[str]:
+        # Each request is handled in a forked process, so changing the
+        # working directory doesn't affect other requests.
+        os.chdir(message["cwd"])
+        args = argparse.Namespace(**message["args"])
+        if args.clang_library_file is None:
+            args.clang_library_file = self.server.clang_library_file
+        return generator.main(args)
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Remove ``socket_path`` if no server is listening on it."""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+            return
+        except OSError:
+            return  # Let ``bind`` report the error.
+    raise utils.DrMockRuntimeError(f"{socket_path} is already in use")
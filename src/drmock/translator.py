@@ -7,15 +7,35 @@
 This module translates a C++ source into the corresponding AST using the
 ``translate``. Before calling ``translate``, you must set the path to
 the ``libclang.dll/.so/.dylib`` _file_ using ``set_library_file``.
+
+The ``extract_XXX`` functions walk the subtree of a node once and
+collect everything that the ``types`` module needs into the plain
+objects of the ``records`` module, so that no further calls into
+libclang are required for building the ``types`` objects.
+``extract_class`` tokenizes the class only once; the tokens of the
+members are slices of the class' tokens.
+
+All calls of ``translate`` share the ``clang.cindex.Index`` held by the
+process' ``Session`` object (see ``get_session``), so libclang's index
+is only set up once per process.
 """
 
 from __future__ import annotations
 
+import bisect
+import collections
+import ctypes
+import functools
+import os
 import re
-from typing import Optional
+import sys
+from typing import Any, Callable, Optional, Sequence, Union
 
 import clang.cindex
 
+from drmock import pch
+from drmock import profiles
+from drmock import records
 from drmock import utils
 
 DIAGNOSTIC_FORMAT_OPTIONS = (
@@ -27,46 +47,265 @@ DIAGNOSTIC_FORMAT_OPTIONS = (
     | clang.cindex.Diagnostic.DisplayCategoryName
 )
 
+# Not exposed by ``clang.cindex``; see ``CXTranslationUnit_Flags`` in
+# libclang's ``Index.h``.
+_PARSE_CREATE_PREAMBLE_ON_FIRST_PARSE = 0x100
+_PARSE_SINGLE_FILE = 0x400
+
+PARSE_PROFILES = profiles.PARSE_PROFILES
+DEFAULT_PARSE_PROFILE = profiles.DEFAULT_PARSE_PROFILE
+
 CLASS_CURSORS = {
     clang.cindex.CursorKind.CLASS_DECL,
     clang.cindex.CursorKind.CLASS_TEMPLATE,
 }
 
+TYPE_ALIAS_CURSORS = {
+    clang.cindex.CursorKind.TYPE_ALIAS_DECL,
+    clang.cindex.CursorKind.TYPE_ALIAS_TEMPLATE_DECL,
+}
+
 
 def set_library_file(file: str) -> None:
     """Args:
     file: path to libclang dynamic library.
+
+    Calling this function again with the same ``file`` after libclang
+    was loaded is a no-op.
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If a different library file was already loaded
     """
+    if clang.cindex.Config.loaded:
+        if os.fspath(file) == clang.cindex.Config.library_file:
+            return
+        raise utils.DrMockRuntimeError(
+            f"Failed to set clang library file to {file}: libclang was already"
+            f" loaded from {clang.cindex.Config.library_file}"
+        )
     clang.cindex.Config.set_library_file(file)
 
 
+class Session:
+    """Holds a ``clang.cindex.Index`` and its global options.
+
+    The index is created on first use and then reused by every call of
+    ``translate`` which uses this session.
+    """
+
+    def __init__(self, exclude_decls: bool = False, global_options: int = 0) -> None:
+        """Args:
+        exclude_decls:
+            Exclude declarations from PCH files from the translation
+            units
+        global_options:
+            A bitwise or of ``CXGlobalOpt_XXX`` flags, which are passed
+            to ``clang_CXIndex_setGlobalOptions``
+        """
+        self._exclude_decls = exclude_decls
+        self._global_options = global_options
+        self._index = None
+
+    @property
+    def index(self) -> clang.cindex.Index:
+        """The session's index (created on first access).
+
+        Raises:
+            clang.cindex.LibclangError:
+                If the libclang path is not set or not found (see
+                ``set_library_file``)
+        """
+        if self._index is None:
+            self._index = clang.cindex.Index.create(self._exclude_decls)
+            if self._global_options:
+                clang.cindex.conf.lib.clang_CXIndex_setGlobalOptions(
+                    self._index, self._global_options
+                )
+        return self._index
+
+
+_session: Optional[Session] = None
+
+
+def get_session() -> Session:
+    """Return the process' default session (create it if necessary)."""
+    global _session
+    if _session is None:
+        _session = Session()
+    return _session
+
+
+# Return values of ``clang_visitChildren``'s visitor.
+_CHILD_VISIT_BREAK = 0
+_CHILD_VISIT_CONTINUE = 1
+
+
+# The number of libclang calls made by ``Node`` objects, by property;
+# see ``get_ffi_calls``.
+_ffi_calls: collections.Counter[str] = collections.Counter()
+
+
+def get_ffi_calls() -> dict[str, int]:
+    """Return the number of libclang calls made to get the (cached)
+    properties and children of ``Node`` objects, by property."""
+    return dict(_ffi_calls)
+
+
+def reset_ffi_calls() -> None:
+    """Reset the counters of ``get_ffi_calls``."""
+    _ffi_calls.clear()
+
+
+def _cached(name: str, get: Callable[[clang.cindex.Cursor], Any], ffi: bool = True):
+    """Return a property of ``Node`` which calls ``get`` on the node's
+    cursor the first time it's accessed, and then returns the cached
+    result.
+
+    Args:
+        name:
+            The name of the property and (with leading underscore) of
+            the slot which holds the cached result
+        get: Returns the property of a cursor
+        ffi: Indicates if ``get`` calls into libclang
+    """
+    slot = "_" + name
+
+    def getter(self: Node) -> Any:
+        try:
+            return getattr(self, slot)
+        except AttributeError:  # Slot is not set.
+            pass
+        if ffi:
+            _ffi_calls[name] += 1
+        result = get(self._cursor)
+        setattr(self, slot, result)
+        return result
+
+    return property(getter, doc=f"The (cached) ``{name}`` of the cursor.")
+
+
 class Node:
     """Wrapper class for ``clang.cindex.Cursor`` which tracks file
-    membership."""
+    membership.
+
+    Only cursors from the main file of the translation unit (the file
+    passed to ``translate``) are considered children of a node. File
+    membership is checked using ``clang_Location_isFromMainFile``, so no
+    ``clang.cindex.File`` objects need to be created during traversal.
+
+    The properties of the cursor which are used for extracting records
+    and the children of the node are cached, so that each of them costs
+    at most one call into libclang per node.
+    """
+
+    __slots__ = (
+        "_cursor",
+        "_path",
+        "_pch_dependencies",
+        "_children",
+        "_kind",
+        "_spelling",
+        "_type",
+        "_location",
+        "_underlying_typedef_type",
+        "_exception_specification_kind",
+        "_is_definition",
+        "_is_const_method",
+        "_is_virtual_method",
+        "_is_pure_virtual_method",
+    )
 
     def __init__(self, cursor: clang.cindex.Cursor, path: str) -> None:
         """Args:
         cursor: The wrapper cursor
-        path: The file that the cursor belongs to
+        path: The file that the cursor belongs to (the main file)
         """
         self._cursor = cursor
         self._path = path
+        # The files which the PCH used for parsing depends on (only set
+        # on the root node returned by ``translate``).
+        self._pch_dependencies: Sequence[str] = ()
 
     @property
     def cursor(self) -> clang.cindex.Cursor:
         return self._cursor
 
+    # ``Cursor.kind`` is read from the cursor struct, but converting it
+    # to a ``CursorKind`` is worth caching, too.
+    kind = _cached("kind", lambda cursor: cursor.kind, ffi=False)
+    spelling = _cached("spelling", lambda cursor: cursor.spelling)
+    type = _cached("type", lambda cursor: cursor.type)
+    location = _cached("location", lambda cursor: cursor.location)
+    underlying_typedef_type = _cached(
+        "underlying_typedef_type", lambda cursor: cursor.underlying_typedef_type
+    )
+    exception_specification_kind = _cached(
+        "exception_specification_kind",
+        lambda cursor: cursor.exception_specification_kind,
+    )
+    is_definition = _cached("is_definition", lambda cursor: cursor.is_definition())
+    is_const_method = _cached(
+        "is_const_method", lambda cursor: cursor.is_const_method()
+    )
+    is_virtual_method = _cached(
+        "is_virtual_method", lambda cursor: cursor.is_virtual_method()
+    )
+    is_pure_virtual_method = _cached(
+        "is_pure_virtual_method", lambda cursor: cursor.is_pure_virtual_method()
+    )
+
     def get_children(self) -> list[Node]:
-        """Get all children from the same file."""
-        return [
-            Node(each, self._path)
-            for each in self._cursor.get_children()
-            if str(each.location.file) == self._path
-        ]
+        """Get all children from the same file.
+
+        The children are cached; the returned list **must** not be
+        modified.
+        """
+        try:
+            return self._children
+        except AttributeError:  # Slot is not set.
+            pass
+        result = []
+
+        def visitor(cursor: clang.cindex.Cursor) -> bool:
+            result.append(Node(cursor, self._path))
+            return False
+
+        self._visit_children(visitor)
+        self._children = result
+        return result
+
+    def _visit_children(self, visitor: Callable[[clang.cindex.Cursor], bool]) -> None:
+        """Call ``visitor`` on every child cursor from the main file.
+
+        The traversal stops as soon as ``visitor`` returns ``True``.
+        """
+        is_from_main_file = _get_location_is_from_main_file()
+        get_location = clang.cindex.conf.lib.clang_getCursorLocation
+        tu = self._cursor._tu
+        error = []
+
+        def callback(child, parent, data):
+            if not is_from_main_file(get_location(child)):
+                return _CHILD_VISIT_CONTINUE
+            child._tu = tu  # Keep the TU alive, see ``Cursor.get_children``.
+            try:
+                stop = visitor(child)
+            except Exception as e:  # Don't let ctypes swallow the exception.
+                error.append(e)
+                return _CHILD_VISIT_BREAK
+            return _CHILD_VISIT_BREAK if stop else _CHILD_VISIT_CONTINUE
+
+        _ffi_calls["children"] += 1
+        clang.cindex.conf.lib.clang_visitChildren(
+            self._cursor, clang.cindex.callbacks["cursor_visit"](callback), None
+        )
+        if error:
+            raise error[0]
 
     def get_tokens(self) -> list[str]:
         """Get the cursor's tokens."""
-        return [each.spelling for each in self._cursor.get_tokens()]
+        return [sys.intern(each.spelling) for each in self._cursor.get_tokens()]
 
     def find_matching_class(
         self, regex: str
@@ -81,33 +320,250 @@ class Node:
             A matching class and the enclosing namespace, or
             ``(None, [])`` if there is no match
         """
-        return self._find_matching_class_impl(regex, [])
+        matches = []
+        self._find_matching_classes_impl(regex, [], matches, first_only=True)
+        if matches:
+            return matches[0]
+        return None, []
 
-    def _find_matching_class_impl(
-        self, regex: str, enclosing_namespace: list[str]
-    ) -> Union[tuple[Optional[Node], list[str]]]:
-        for each in self.get_children():
-            if each.cursor.kind == clang.cindex.CursorKind.NAMESPACE:
-                enclosing_namespace.append(each.cursor.displayname)
-                class_, namespace = each._find_matching_class_impl(
-                    regex, enclosing_namespace
+    def find_matching_classes(self, regex: str) -> list[tuple[Node, list[str]]]:
+        """Search the tree under ``self`` for all class definitions whose
+        name matches ``regex``.
+
+        Args:
+            regex: The regex to match the sought classes' names against
+
+        Returns:
+            The matching classes and their enclosing namespaces in the
+            order of their occurence
+        """
+        matches = []
+        self._find_matching_classes_impl(regex, [], matches, first_only=False)
+        return matches
+
+    def _find_matching_classes_impl(
+        self,
+        regex: str,
+        enclosing_namespace: list[str],
+        matches: list[tuple[Node, list[str]]],
+        first_only: bool,
+    ) -> None:
+        # If ``first_only`` is set, stop the traversal as soon as a match
+        # is found, so that the rest of the translation unit is not
+        # visited.
+        def visitor(cursor: clang.cindex.Cursor) -> bool:
+            kind = cursor.kind
+            if kind == clang.cindex.CursorKind.NAMESPACE:
+                enclosing_namespace.append(cursor.displayname)
+                Node(cursor, self._path)._find_matching_classes_impl(
+                    regex, enclosing_namespace, matches, first_only
                 )
-                if class_ is not None:
-                    return class_, namespace
                 enclosing_namespace.pop()  # Remove namespace upon leaving the node!
-            if each.cursor.kind in CLASS_CURSORS and re.match(
-                regex, each.cursor.spelling
-            ):
-                return each, enclosing_namespace
-        return None, []
+            elif kind in CLASS_CURSORS and re.match(regex, cursor.spelling):
+                # Forward declarations are only used as first match.
+                if first_only or cursor.is_definition():
+                    matches.append((Node(cursor, self._path), enclosing_namespace[:]))
+            return first_only and bool(matches)
 
+        self._visit_children(visitor)
 
-def translate_file(path: str, compiler_flags: Optional[list[str]] = None) -> Node:
+
+class TokenBuffer:
+    """The tokens of a cursor, indexed by their source offset.
+
+    The tokens of any cursor within the extent of the buffer's cursor
+    can be obtained by slicing the buffer, so that overlapping ranges
+    need not be tokenized again. The spellings are interned.
+    """
+
+    def __init__(self, cursor: clang.cindex.Cursor) -> None:
+        """Args:
+        cursor: The cursor whose tokens are stored
+        """
+        get_location = clang.cindex.conf.lib.clang_getTokenLocation
+        self._offsets = []
+        self._spellings = []
+        for each in cursor.get_tokens():
+            self._offsets.append(_get_offset(get_location(each._tu, each)))
+            self._spellings.append(sys.intern(each.spelling))
+
+    def get_tokens(self, node: Node) -> list[str]:
+        """Get the tokens of ``node``, which must be within the extent of
+        the buffer's cursor."""
+        extent = clang.cindex.conf.lib.clang_getCursorExtent(node.cursor)
+        begin = _get_offset(clang.cindex.conf.lib.clang_getRangeStart(extent))
+        end = _get_offset(clang.cindex.conf.lib.clang_getRangeEnd(extent))
+        # Same as ``clang_tokenize``: Every token which starts in the
+        # half-open interval [begin, end).
+        lo = bisect.bisect_left(self._offsets, begin)
+        hi = bisect.bisect_left(self._offsets, end, lo)
+        return self._spellings[lo:hi]
+
+
+def _get_offset(location: clang.cindex.SourceLocation) -> int:
+    # Unlike ``SourceLocation.offset``, this doesn't create a ``File``
+    # object.
+    result = ctypes.c_uint()
+    clang.cindex.conf.lib.clang_getInstantiationLocation(
+        location, None, None, None, ctypes.byref(result)
+    )
+    return result.value
+
+
+def _get_tokens(node: Node, tokens: Optional[TokenBuffer]) -> list[str]:
+    if tokens is None:
+        return node.get_tokens()
+    return tokens.get_tokens(node)
+
+
+def extract_class(node: Node) -> records.ClassRecord:
+    """Collect the info on a class node and its members in a single pass.
+
+    Ctor, dtors, field variables, etc. are skipped.
+    """
+    assert node.kind in CLASS_CURSORS
+    tokens = TokenBuffer(node.cursor)
+    result = records.ClassRecord(node.spelling)
+    if node.kind == clang.cindex.CursorKind.CLASS_TEMPLATE:
+        result.template_params = []
+
+    access = "private"
+    for each in node.get_children():
+        kind = each.kind
+        if kind == clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER:
+            if result.template_params is not None:
+                result.template_params.append(tokens.get_tokens(each))
+        elif kind == clang.cindex.CursorKind.CXX_ACCESS_SPEC_DECL:
+            access = _access_spec_from_tokens(tokens.get_tokens(each))
+        elif kind == clang.cindex.CursorKind.FIELD_DECL:
+            # A field decl can mean one of two things: (1) A field in a
+            # non-abstract base class, (2) a macro notification created
+            # by us.
+            field_tokens = tokens.get_tokens(each)  # ['int', 'Q_OBJECT'], etc.
+            assert field_tokens
+            field_tokens = field_tokens[1:]  # ['Q_OBJECT']
+            var = field_tokens[-1] if field_tokens else None
+            if var == "Q_OBJECT":
+                result.q_object = True
+        elif kind == clang.cindex.CursorKind.CXX_METHOD:
+            member = extract_method(each, tokens)
+            member.access = access
+            result.members.append(member)
+        elif kind in TYPE_ALIAS_CURSORS:
+            member = extract_type_alias(each, tokens)
+            member.access = access
+            result.members.append(member)
+    return result
+
+
+def extract_method(
+    node: Node, tokens: Optional[TokenBuffer] = None
+) -> records.MethodRecord:
+    """Collect the info on a method node and its parameters.
+
+    Args:
+        node: The method node
+        tokens: A token buffer which contains the node (optional)
+    """
+    return records.MethodRecord(
+        spelling=node.spelling,
+        tokens=_get_tokens(node, tokens),
+        params=[
+            extract_param(each, tokens)
+            for each in node.get_children()
+            if each.kind == clang.cindex.CursorKind.PARM_DECL
+        ],
+        const=node.is_const_method,
+        virtual=node.is_virtual_method,
+        pure_virtual=node.is_pure_virtual_method,
+        noexcept=(
+            node.exception_specification_kind
+            == clang.cindex.ExceptionSpecificationKind.BASIC_NOEXCEPT
+        ),
+    )
+
+
+def extract_param(
+    node: Node, tokens: Optional[TokenBuffer] = None
+) -> records.ParamRecord:
+    """Collect the info on a parameter node.
+
+    Args:
+        node: The parameter node
+        tokens: A token buffer which contains the node (optional)
+    """
+    type_ = node.type
+    return records.ParamRecord(
+        spelling=node.spelling,
+        tokens=_get_tokens(node, tokens),
+        const=type_.is_const_qualified(),
+        volatile=type_.is_volatile_qualified(),
+    )
+
+
+def extract_type_alias(
+    node: Node, tokens: Optional[TokenBuffer] = None
+) -> records.TypeAliasRecord:
+    """Collect the info on a (template) type alias node.
+
+    Args:
+        node: The type alias node
+        tokens: A token buffer which contains the node (optional)
+    """
+    if node.kind != clang.cindex.CursorKind.TYPE_ALIAS_TEMPLATE_DECL:
+        return records.TypeAliasRecord(
+            node.spelling, node.underlying_typedef_type.spelling
+        )
+
+    template_params = []
+    decl = None
+    for each in node.get_children():
+        kind = each.kind
+        if kind == clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER:
+            template_params.append(_get_tokens(each, tokens))
+        elif kind == clang.cindex.CursorKind.TYPE_ALIAS_DECL and decl is None:
+            decl = each
+    return records.TypeAliasRecord(
+        decl.spelling,
+        decl.underlying_typedef_type.spelling,
+        template_params,
+    )
+
+
+def extract_template_params(node: Node) -> list[list[str]]:
+    """Collect the tokens of the template type parameters of a node."""
+    return [
+        each.get_tokens()
+        for each in node.get_children()
+        if each.kind == clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER
+    ]
+
+
+def _access_spec_from_tokens(tokens: list[str]) -> str:
+    """Get access specifier from the tokens of an ``ACCESS_SPEC_DECL``."""
+    # public, protected, private (slots)
+    # Since `slots` and `signals` is #defined as empty, an empty access
+    # spec decl is most likely ``signals:``.
+    if not tokens:
+        return "signals"
+    return tokens[0]
+
+
+def translate_file(
+    path: str,
+    compiler_flags: Optional[list[str]] = None,
+    session: Optional[Session] = None,
+    pch_cache: Optional[pch.Cache] = None,
+    profile: str = DEFAULT_PARSE_PROFILE,
+) -> Node:
     """Translate the content of ``path`` into its AST.
 
     Args:
         path: The path to the file
         compiler_flags: A list of compiler flags used for parsing
+        session: The session to use; defaults to ``get_session()``
+        pch_cache: If set, precompile the source's include prefix
+        profile: The parse profile (see ``PARSE_PROFILES``)
 
     Raises:
         clang.cindex.LibclangError:
@@ -118,11 +574,18 @@ def translate_file(path: str, compiler_flags: Optional[list[str]] = None) -> Nod
     """
     with open(path, "r") as f:
         source = f.read()
-    return translate(path, source, compiler_flags)
+    return translate(path, source, compiler_flags, session, pch_cache, profile)
 
 
 def translate(
-    path: str, source: str, compiler_flags: Optional[list[str]] = None
+    path: str,
+    source: str,
+    compiler_flags: Optional[list[str]] = None,
+    session: Optional[Session] = None,
+    pch_cache: Optional[pch.Cache] = None,
+    profile: str = DEFAULT_PARSE_PROFILE,
+    reparsable: bool = False,
+    single_file: bool = False,
 ) -> Node:
     """Translate a string with C++ code into its AST.
 
@@ -130,17 +593,39 @@ def translate(
         path: The path of the parsed file
         source: The C++ source
         compiler_flags: A list of compiler flags used for parsing
+        session: The session to use; defaults to ``get_session()``
+        pch_cache:
+            If set, the include prefix of ``source`` is precompiled
+            (or loaded from the cache) and passed to the parser
+        profile: The parse profile (see ``PARSE_PROFILES``)
+        reparsable:
+            If set, the preamble of ``source`` (its leading includes) is
+            precompiled on the first parse, so that calling ``reparse``
+            is cheap; ``pch_cache`` is ignored
+        single_file:
+            If set, ``#include`` directives are not followed and errors
+            don't raise (use ``get_errors`` to check the nodes of
+            interest); ``pch_cache`` is ignored
 
     Raises:
         clang.cindex.LibclangError:
             If the libclang path is not set or not found (see
             ``set_library_file``)
         utils.DrMockRuntimeError:
-            If ``path`` is empty
+            If ``path`` is empty or ``profile`` is unknown
 
     Note: The ``path`` parameter is required due to ``clang`` details.
     It need not be a real path, but it must be non-empty. Choosing a
     unique name is useful, as it is used in clang's diagnostics.
+
+    The preamble is only precompiled if ``path`` exists on disk.
+
+    If parsing with a cached PCH fails, the source is parsed without it.
+    The PCH is discarded if it's stale (for example, because a header in
+    the include prefix has changed since the PCH was built), and
+    rejected (see ``pch.Cache.reject``) if the source parses fine
+    without it. Otherwise, the errors are in the source itself, and the
+    PCH is kept for other sources.
     """
     if not path:
         raise utils.DrMockRuntimeError(
@@ -150,15 +635,118 @@ def translate(
     if compiler_flags is None:
         compiler_flags = []
 
-    index = clang.cindex.Index.create()
-    try:
-        tu = index.parse(
-            path, ["-x", "c++"] + compiler_flags, unsaved_files=[(path, source)]
+    options = PARSE_PROFILES.get(profile, None)
+    if options is None:
+        raise utils.DrMockRuntimeError(
+            f"translate failed: Unknown parse profile '{profile}'. Expected one of:"
+            f" {', '.join(PARSE_PROFILES)}"
+        )
+
+    if session is None:
+        session = get_session()
+
+    args = ["-x", "c++"] + compiler_flags
+    if reparsable:
+        options |= (
+            clang.cindex.TranslationUnit.PARSE_PRECOMPILED_PREAMBLE
+            | _PARSE_CREATE_PREAMBLE_ON_FIRST_PARSE
         )
+        pch_cache = None
+    if single_file:
+        options |= _PARSE_SINGLE_FILE | profiles.PARSE_KEEP_GOING
+        pch_cache = None
+    if pch_cache is not None:
+        pch_path = pch_cache.get(session.index, compiler_flags, source)
+        if pch_path is not None:
+            try:
+                tu = _parse(
+                    session.index,
+                    path,
+                    args + ["-include-pch", pch_path],
+                    source,
+                    options,
+                )
+            except utils.DrMockRuntimeError:  # Stale PCH.
+                tu = None
+            if tu is not None and not tu.diagnostics:
+                result = Node(tu.cursor, path)
+                result._pch_dependencies = pch_cache.get_dependencies(pch_path)
+                return result
+            if tu is None or _concerns_pch(tu, pch_path):
+                pch_cache.discard(pch_path)
+            else:
+                # The diagnostics are either errors in ``source`` (then
+                # the PCH is kept and the errors are reported below) or
+                # caused by using the PCH.
+                fallback = _parse(session.index, path, args, source, options)
+                if not fallback.diagnostics:
+                    pch_cache.reject(pch_path)
+                _check_diagnostics(fallback)
+                return Node(fallback.cursor, path)
+    tu = _parse(session.index, path, args, source, options)
+    if not single_file:
+        _check_diagnostics(tu)
+    return Node(tu.cursor, path)
+
+
+def get_errors(node: Node) -> list[str]:
+    """Return the diagnostics of the translation unit which are located
+    within the extent of ``node``.
+
+    Used for checking if ``node`` was translated correctly by a single
+    file parse (see ``translate``), in which types and macros from
+    included files are unknown.
+    """
+    is_from_main_file = _get_location_is_from_main_file()
+    extent = node.cursor.extent
+    begin = extent.start.offset
+    end = extent.end.offset
+    return [
+        each.format(DIAGNOSTIC_FORMAT_OPTIONS)
+        for each in node.cursor.translation_unit.diagnostics
+        if is_from_main_file(each.location) and begin <= each.location.offset <= end
+    ]
+
+
+def reparse(root: Node, source: str) -> Node:
+    """Translate the new contents of a translated file.
+
+    Args:
+        root: The root node returned by ``translate`` (or ``reparse``)
+        source: The new C++ source
+
+    Returns:
+        The new root node. All nodes of the previous translation are
+        invalidated.
+
+    Raises:
+        utils.DrMockRuntimeError:
+            If reparsing fails
+
+    The files included by ``source`` are read from disk again. If
+    ``root`` was translated using ``reparsable=True``, the precompiled
+    preamble is reused unless the preamble or one of the files it
+    includes has changed.
+    """
+    tu = root.cursor.translation_unit
+    try:
+        tu.reparse(unsaved_files=[(root._path, source)])
     except clang.cindex.TranslationUnitLoadError as e:
         raise utils.DrMockRuntimeError(str(e))
+    _check_diagnostics(tu)
+    return Node(tu.cursor, root._path)
+
+
+def _concerns_pch(tu: clang.cindex.TranslationUnit, pch_path: str) -> bool:
+    """Check if any diagnostic of ``tu`` concerns the PCH ``pch_path``
+    (for example, if the PCH is stale or was built with other flags)."""
+    return any(
+        each.category_name == "AST Deserialization Issue" or pch_path in each.spelling
+        for each in tu.diagnostics
+    )
 
-    # Check for errors.
+
+def _check_diagnostics(tu: clang.cindex.TranslationUnit) -> None:
     if tu.diagnostics:
         error = "Clang failed. Details:\n\n"
         error += "\n".join(
@@ -166,4 +754,38 @@ def translate(
         )
         raise utils.DrMockRuntimeError(error)
 
-    return Node(tu.cursor, path)
+
+@functools.lru_cache(maxsize=None)
+def _get_location_is_from_main_file() -> Callable[[clang.cindex.SourceLocation], int]:
+    # ``clang_Location_isFromMainFile`` is not registered by
+    # ``clang.cindex``, so we're setting the signature by hand.
+    result = clang.cindex.conf.lib.clang_Location_isFromMainFile
+    result.argtypes = [clang.cindex.SourceLocation]
+    result.restype = ctypes.c_int
+    return result
+
+
+def get_included_files(root: Node) -> list[str]:
+    """Return the absolute paths of all files included while parsing.
+
+    Args:
+        root: The root node returned by ``translate``
+
+    Files included by the precompiled include prefix (if any) are part
+    of the result, too. The result is sorted and free of duplicates.
+    """
+    tu = root.cursor.translation_unit
+    result = {os.path.abspath(each.include.name) for each in tu.get_includes()}
+    result.update(root._pch_dependencies)
+    return sorted(result)
+
+
+def _parse(
+    index: clang.cindex.Index, path: str, args: list[str], source: str, options: int
+) -> clang.cindex.TranslationUnit:
+    try:
+        return index.parse(
+            path, args, unsaved_files=[(path, source)], options=options
+        )
+    except clang.cindex.TranslationUnitLoadError as e:
+        raise utils.DrMockRuntimeError(str(e))
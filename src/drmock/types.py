@@ -16,20 +16,37 @@ def from_node(cls: _T, node: translator.Node) -> _T:
 
 The ``node`` parameter **must** have the correct cursor kind, otherwise
 the call will fail with an error.
+
+The ``from_node`` methods collect the node's info using the
+``translator.extract_XXX`` functions and pass the resulting record to
+the corresponding ``from_record`` method, which builds the object
+without calling into libclang.
 """
 
 from __future__ import annotations
 
-import copy
 import collections
 import dataclasses
-from typing import Any, Optional, Sequence, Union
-import clang.cindex
+import functools
+import re
+import weakref
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Union
 
+from drmock import records
 from drmock import utils
 
+if TYPE_CHECKING:
+    # Importing ``translator`` loads ``clang.cindex``, so it's imported
+    # on demand (when creating objects from nodes).
+    from drmock import translator
+
+# The maximum number of token sequences memoized by ``Type.from_tokens``.
+FROM_TOKENS_CACHE_SIZE = 4096
+
+_INDIRECTIONS = {"*", "&", "&&"}
+
 """We're using an ``OrderedDict`` to ensure that in ``Method.mangled_name``
-for example ``<=>`` is replaced _before_ ``<=`` to ensure that
+for example ``<=>`` is matched _before_ ``<=`` to ensure that
 ``operator<=>`` becomes ``operatorSpaceship`` instead of
 ``operatorLesserOrEqualGreater``.
 """
@@ -67,6 +84,15 @@ _OPERATOR_SYMBOLS = collections.OrderedDict(
         (",", "Comma"),
     ]
 )
+# ``Method.mangled_name`` replaces all symbols in a single pass, so
+# ``<<=`` and ``>>=`` are listed explicitly to keep the names they got
+# when the symbols were replaced one after the other. (They're not in
+# ``_OPERATOR_SYMBOLS``, which also determines ``Method.operator``.)
+_MANGLED_SYMBOLS = collections.OrderedDict(
+    [("<<=", "LesserLesserOrEqual"), (">>=", "GreaterGreaterOrEqual")]
+)
+_MANGLED_SYMBOLS.update(_OPERATOR_SYMBOLS)
+_OPERATOR_REGEX = re.compile("|".join(re.escape(each) for each in _MANGLED_SYMBOLS))
 
 
 def from_node(node: translator.Node) -> Any:
@@ -82,6 +108,8 @@ def from_node(node: translator.Node) -> Any:
     Raises:
         ValueError: If the appropriate class cannot be determined
     """
+    import clang.cindex
+
     if not hasattr(from_node, "_DISPATCH"):
         from_node._DISPATCH = {
             clang.cindex.CursorKind.PARM_DECL: Type,
@@ -89,17 +117,14 @@ def from_node(node: translator.Node) -> Any:
             clang.cindex.CursorKind.TYPE_ALIAS_TEMPLATE_DECL: TypeAlias,
             clang.cindex.CursorKind.TYPE_ALIAS_DECL: TypeAlias,
         }
-    cursor = node.cursor
-    type_ = from_node._DISPATCH.get(cursor.kind, None)
+    kind = node.kind
+    type_ = from_node._DISPATCH.get(kind, None)
     if not type_:
-        keys = ", ".join(each.cursor.kind.name for each in from_node._DISPATCH)
-        raise ValueError(
-            f"Invalid CursorKind. Expected: {keys}; received: {cursor.kind.name}"
-        )
+        keys = ", ".join(each.name for each in from_node._DISPATCH)
+        raise ValueError(f"Invalid CursorKind. Expected: {keys}; received: {kind.name}")
     return type_.from_node(node)
 
 
-@dataclasses.dataclass
 class Type:
     """For C++ type declarations.
 
@@ -115,18 +140,114 @@ class Type:
 
     >>> type_ = Type('int')
     >>> naked = Type(type_)  # Represents same type, but with naked first layer
+
+    Instances are immutable and hash-consed: Constructing a type which
+    is equal to a living instance returns that very instance, so equal
+    types share their layers, their string representation and their
+    decayed form. Use ``replace`` to create a modified type.
+
+    >>> Type('int', const=True) is Type('int', const=True)
+    True
     """
 
+    __slots__ = (
+        "inner",
+        "const",
+        "volatile",
+        "lvalue_ref",
+        "rvalue_ref",
+        "pointer",
+        "parameter_pack",
+        "_hash",
+        "_str",
+        "_decayed",
+        "__weakref__",
+    )
+
     inner: Union[str, Type]
-    const: bool = False
-    volatile: bool = False
-    lvalue_ref: bool = False
-    rvalue_ref: bool = False
-    pointer: bool = False
-    parameter_pack: bool = False
+    const: bool
+    volatile: bool
+    lvalue_ref: bool
+    rvalue_ref: bool
+    pointer: bool
+    parameter_pack: bool
+
+    _FIELDS = __slots__[:7]
+    _interned: weakref.WeakValueDictionary[tuple, Type] = weakref.WeakValueDictionary()
+
+    def __new__(
+        cls,
+        inner: Union[str, Type],
+        const: bool = False,
+        volatile: bool = False,
+        lvalue_ref: bool = False,
+        rvalue_ref: bool = False,
+        pointer: bool = False,
+        parameter_pack: bool = False,
+    ) -> Type:
+        key = (
+            inner,
+            bool(const),
+            bool(volatile),
+            bool(lvalue_ref),
+            bool(rvalue_ref),
+            bool(pointer),
+            bool(parameter_pack),
+        )
+        result = cls._interned.get(key)
+        if result is not None:
+            return result
+        result = object.__new__(cls)
+        for name, value in zip(cls._FIELDS, key):
+            object.__setattr__(result, name, value)
+        object.__setattr__(result, "_hash", hash(key))
+        object.__setattr__(result, "_str", None)
+        object.__setattr__(result, "_decayed", None)
+        cls._interned[key] = result
+        return result
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise dataclasses.FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise dataclasses.FrozenInstanceError(f"cannot delete field '{name}'")
+
+    # Equal types are identical, see ``__new__``.
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Type):
+            return NotImplemented
+        return self is other
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __copy__(self) -> Type:
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> Type:
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return Type, self._key()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{each}={getattr(self, each)!r}" for each in self._FIELDS)
+        return f"Type({fields})"
+
+    def _key(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, each) for each in self._FIELDS)
+
+    def replace(self, **changes: Any) -> Type:
+        """Return ``self`` with the fields in ``changes`` replaced."""
+        fields = dict(zip(self._FIELDS, self._key()))
+        fields.update(changes)
+        return Type(**fields)
 
     def get_decayed(self) -> Type:
-        """Return the decayed version of ``self``."""
+        """Return the decayed version of ``self``.
+
+        The result is computed only once per type.
+        """
         # Note that if an instance of `Type` is a reference, then its
         # const qualifier is saved in the inner type. This is due to the
         # confusion between the terms "const reference" and "reference
@@ -136,23 +257,24 @@ class Type:
         # qualifiers. Therefore, when decaying a reference, the cv
         # qualifiers must be removed from the inner type; otherwise,
         # they must be removed from the instance itself.
+        if self._decayed is not None:
+            return self._decayed
 
         result = self._get_simplified()  # In case top item is naked.
         if result.lvalue_ref or result.rvalue_ref:
-            result.lvalue_ref = False
-            result.rvalue_ref = False
-            if not isinstance(result.inner, str):
-                result.inner.const = False
-                result.inner.volatile = False
+            inner = result.inner
+            if not isinstance(inner, str):
+                inner = inner.replace(const=False, volatile=False)
+            result = result.replace(inner=inner, lvalue_ref=False, rvalue_ref=False)
         else:
-            result.const = False
-            result.volatile = False
+            result = result.replace(const=False, volatile=False)
         result = (
             result._get_simplified()
         )  # If ``result`` was a reference, it's now naked.
+        object.__setattr__(self, "_decayed", result)
         return result
 
-    def _get_simplified(self, first_pass: bool = True) -> Type:
+    def _get_simplified(self, first_pass: bool = True) -> Union[str, Type]:
         """Return equivalent type with naked layers removed.
 
         Args:
@@ -166,11 +288,6 @@ class Type:
         while not isinstance(result.inner, str) and result._is_naked():
             result = result.inner
 
-        # Create a copy of the new base object on the first iteration.
-        # On later iterations, we need to make sure that
-        if first_pass:
-            result = copy.deepcopy(result)
-
         # If the outer type is a base-type, we're done. On a later
         # iteration, the last type may be naked and must be skipped. On
         # the first iteration, the last naked type is used as wrapper.
@@ -179,9 +296,12 @@ class Type:
                 return result.inner
             return result
 
-        # Otherwise, simplify the inner type.
-        result.inner = result.inner._get_simplified(False)
-        return result
+        # Otherwise, simplify the inner type. As types are immutable,
+        # unchanged layers are shared with ``self``.
+        inner = result.inner._get_simplified(False)
+        if inner is result.inner:
+            return result
+        return result.replace(inner=inner)
 
     def _is_naked(self) -> bool:
         """Check if ``self`` is naked."""
@@ -195,6 +315,8 @@ class Type:
         )
 
     def __str__(self):
+        if self._str is not None:
+            return self._str
         result = str(self.inner)
         result += self.lvalue_ref * " &" + self.rvalue_ref * " &&"
         if self.pointer:
@@ -202,10 +324,17 @@ class Type:
         else:
             result = self.const * "const " + self.volatile * "volatile " + result
         result += self.parameter_pack * " ..."
+        object.__setattr__(self, "_str", result)
         return result
 
     @classmethod
     def from_node(cls, node: translator.Node) -> Type:
+        from drmock import translator
+
+        return cls.from_record(translator.extract_param(node))
+
+    @classmethod
+    def from_record(cls, record: records.ParamRecord) -> Type:
         # NOTE The following is a hack to solve some rather unfortunate
         # behavior of python clang. When using a type alias such as
         #
@@ -264,69 +393,34 @@ class Type:
         # name. Otherwise, a complex route must be taken.
 
         # Check for variable name or parameter pack and call ``from_tokens``.
-        tokens = node.get_tokens()  # ['const', 'T', '&', '...', 'foo']
-        var = node.cursor.spelling  # 'foo'
+        tokens = list(record.tokens)  # ['const', 'T', '&', '...', 'foo']
+        var = record.spelling  # 'foo'
         if var != "" and tokens[-1] == var:  # Remove variable/parameter name.
             tokens.pop()
         result = cls.from_tokens(tokens)
         # In some cases (e.g. ``const T*const``), the outer const is not
         # found in the tokens, so we must use class methods.
-        result.const = node.cursor.type.is_const_qualified()
-        result.volatile = node.cursor.type.is_volatile_qualified()
-        return result
+        return result.replace(const=record.const, volatile=record.volatile)
 
     @classmethod
     def from_tokens(cls, tokens: Sequence[str]) -> Type:
-        """Create a ``Type`` instance from a sequence of tokens."""
-        t = cls("T")  # Use temporary inner name to init ``t``.
+        """Create a ``Type`` instance from a sequence of tokens.
 
-        # Read from the right.
-        while True:
-            if tokens[-1] == "const":
-                t.const = True
-                tokens.pop()
-            elif tokens[-1] == "volatile":
-                t.volatile = True
-                tokens.pop()
-            elif tokens[-1] == "...":
-                t.parameter_pack = True
-                tokens.pop()
-            elif tokens[-1] == "*":
-                t.pointer = True
-                tokens.pop()
-                break
-            elif tokens[-1] == "&":
-                t.lvalue_ref = True
-                tokens.pop()
-                break
-            elif tokens[-1] == "&&":
-                t.rvalue_ref = True
-                tokens.pop()
-                break
-            else:
-                break
+        The results are memoized by the tokens (see
+        ``from_tokens_cache_info``).
+        """
+        return _parse_tokens(tuple(tokens))
 
-        # If ``t`` is a pointer or a reference, reassemble the remaining
-        # tokens and call ``from_tokens`` recursively.
-        if t.pointer or t.lvalue_ref or t.rvalue_ref:
-            t.inner = Type.from_tokens(tokens)
-            return t._get_simplified()
-
-        # If ``t`` is not a pointer or a reference, then read from the
-        # left.
-        while True:
-            if tokens[0] == "const":
-                t.const = True
-                tokens.pop(0)
-            elif tokens[0] == "volatile":
-                t.volatile = True
-                tokens.pop(0)
-            else:
-                break
+    @staticmethod
+    def from_tokens_cache_info() -> functools._CacheInfo:
+        """Return the hits, misses and size of the ``from_tokens`` memo
+        table."""
+        return _parse_tokens.cache_info()
 
-        # Terminate the recursion by reassembeling the remaining tokens.
-        t.inner = " ".join(tokens)
-        return t._get_simplified()
+    @staticmethod
+    def from_tokens_cache_clear() -> None:
+        """Clear the ``from_tokens`` memo table and its statistics."""
+        _parse_tokens.cache_clear()
 
     @classmethod
     def from_spelling(cls, spelling: str) -> Type:
@@ -335,9 +429,73 @@ class Type:
         return cls.from_tokens(tokens)
 
 
+@functools.lru_cache(maxsize=FROM_TOKENS_CACHE_SIZE)
+def _parse_tokens(tokens: tuple[str, ...]) -> Type:
+    """Implementation of ``Type.from_tokens``.
+
+    The tokens are read from the right, one pointer or reference layer
+    at a time, and then from the left. Instead of popping tokens, the
+    unread tokens are tracked using the indices ``begin`` and ``end``,
+    so that parsing is linear in the number of tokens.
+    """
+    layers = []  # The qualifiers of each layer, from the outside in.
+    begin, end = 0, len(tokens)
+    while True:
+        qualifiers = dict.fromkeys(Type._FIELDS[1:], False)
+        # Read from the right.
+        while begin < end:
+            token = tokens[end - 1]
+            if token == "const":
+                qualifiers["const"] = True
+            elif token == "volatile":
+                qualifiers["volatile"] = True
+            elif token == "...":
+                qualifiers["parameter_pack"] = True
+            elif token == "*":
+                qualifiers["pointer"] = True
+            elif token == "&":
+                qualifiers["lvalue_ref"] = True
+            elif token == "&&":
+                qualifiers["rvalue_ref"] = True
+            else:
+                break
+            end -= 1
+            if token in _INDIRECTIONS:
+                break
+        # If the layer is a pointer or a reference, read the next layer
+        # from the remaining tokens.
+        if (
+            qualifiers["pointer"]
+            or qualifiers["lvalue_ref"]
+            or qualifiers["rvalue_ref"]
+        ):
+            layers.append(qualifiers)
+            continue
+        break
+
+    # The inner-most layer is not a pointer or a reference, so read from
+    # the left.
+    while begin < end:
+        if tokens[begin] == "const":
+            qualifiers["const"] = True
+        elif tokens[begin] == "volatile":
+            qualifiers["volatile"] = True
+        else:
+            break
+        begin += 1
+
+    # Reassemble the remaining tokens and wrap them in the layers.
+    result = Type(" ".join(tokens[begin:end]), **qualifiers)
+    for each in reversed(layers):
+        result = Type(result, **each)
+    return result._get_simplified()
+
+
 class TemplateDecl:  # For TemplateDeclaration
     """For template declarations."""
 
+    __slots__ = ("_params",)
+
     def __init__(self, params: Sequence[str]):
         """Args:
             params: A list of the template decl's params
@@ -381,19 +539,23 @@ class TemplateDecl:  # For TemplateDeclaration
 
     @classmethod
     def from_node(cls, node: translator.Node) -> TemplateDecl:
-        params = []
-        for each in node.get_children():
-            if each.cursor.kind == clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER:
-                # The following is a hack used to circumvent the problem
-                # that `cindex.CursorKind.TEMPLATE_TYPE_PARAMETER` is
-                # unable to recognize variadic template parameters.
-                # Fortunately, it is possible to detect "..." using the
-                # `get_tokens()` method.
-                tokens = (
-                    each.get_tokens()
-                )  # ["typename", "T"] or ["typename", "...", "Ts"]
-                name = " ".join(tokens[1:])  # "T" or "... Ts"
-                params.append(name)
+        from drmock import translator
+
+        return cls.from_record(translator.extract_template_params(node))
+
+    @classmethod
+    def from_record(cls, template_params: Sequence[Sequence[str]]) -> TemplateDecl:
+        """Args:
+        template_params: The tokens of each template type parameter
+        """
+        # The following is a hack used to circumvent the problem that
+        # `cindex.CursorKind.TEMPLATE_TYPE_PARAMETER` is unable to
+        # recognize variadic template parameters. Fortunately, it is
+        # possible to detect "..." using the `get_tokens()` method.
+        params = [
+            " ".join(tokens[1:])  # ["typename", "...", "Ts"] -> "... Ts"
+            for tokens in template_params
+        ]
         result = TemplateDecl(params)
         return result
 
@@ -401,6 +563,15 @@ class TemplateDecl:  # For TemplateDeclaration
 class Constructor:
     """For C++ class constructors."""
 
+    __slots__ = (
+        "_name",
+        "_params",
+        "_template",
+        "_initializer_list",
+        "_body",
+        "_access",
+    )
+
     def __init__(
         self,
         name: str,
@@ -436,21 +607,25 @@ class Constructor:
         """The access specifier of the object."""
         return self._access
 
-    def __str__(self) -> str:
-        result = ""
+    def emit(self, emitter: utils.Emitter) -> None:
+        """Write the ctor's code to ``emitter``."""
         if self._template:
-            result += str(self._template) + "\n"
-        result += self._name
+            emitter.write(str(self._template) + "\n")
+        emitter.write(self._name)
         params = ", ".join(str(each) for each in self._params)
-        result += f"({params})"
+        emitter.write(f"({params})")
         if self._initializer_list:
-            result += " : " + ", ".join(self._initializer_list)
-        result += "\n{\n"
-        result += utils.indent(self._body)
-        result += "\n}"
-        return result
+            emitter.write(" : " + ", ".join(self._initializer_list))
+        emitter.write("\n{\n")
+        with emitter.indented():
+            emitter.write(self._body)
+        emitter.write("\n}")
+
+    def __str__(self) -> str:
+        return utils.render(self)
 
 
+@utils.add_slots
 @dataclasses.dataclass
 class Method:
     """For C++ class methods.
@@ -500,42 +675,50 @@ class Method:
 
     def mangled_name(self) -> str:
         """Return the mangled name of the method."""
-        result = self.name
-        for k, v in _OPERATOR_SYMBOLS.items():
-            result = result.replace(k, v)
-        return result
+        return _mangle(self.name)
 
-    def __str__(self) -> str:
-        result = ""
+    def emit(self, emitter: utils.Emitter) -> None:
+        """Write the method's code to ``emitter``."""
         if self.template:
-            result += str(self.template) + "\n"
+            emitter.write(str(self.template) + "\n")
         if self.virtual:
-            result += "virtual "
+            emitter.write("virtual ")
         if (
             self.return_type
         ):  # This check makes sure that no ugly indentation occurs for ctors!
-            result += str(self.return_type) + " "
-        result += self.name
+            emitter.write(str(self.return_type) + " ")
+        emitter.write(self.name)
         params = ", ".join(str(each) for each in self.params)
-        result += f"({params})"
-        result += self.const * " const"
-        result += self.volatile * " volatile"
-        result += self.lvalue * "&"
-        result += self.rvalue * "&&"
-        result += self.noexcept * " noexcept"
-        result += self.override * " override"  # This must always be last!
+        emitter.write(
+            f"({params})"
+            + self.const * " const"
+            + self.volatile * " volatile"
+            + self.lvalue * "&"
+            + self.rvalue * "&&"
+            + self.noexcept * " noexcept"
+            + self.override * " override"  # This must always be last!
+        )
         if self.body:
-            result += "\n{\n"
-            result += utils.indent(self.body)
-            result += "\n}"
+            emitter.write("\n{\n")
+            with emitter.indented():
+                emitter.write(self.body)
+            emitter.write("\n}")
         else:
             if self.pure_virtual:
-                result += " = 0"
-            result += ";"
-        return result
+                emitter.write(" = 0")
+            emitter.write(";")
+
+    def __str__(self) -> str:
+        return utils.render(self)
 
     @classmethod
     def from_node(cls, node: translator.Node) -> Method:
+        from drmock import translator
+
+        return cls.from_record(translator.extract_method(node))
+
+    @classmethod
+    def from_record(cls, record: records.MethodRecord) -> Method:
         # NOTE The following is a hack to solve some rather unfortunate
         # behavior of python clang. When using a type alias such as
         #
@@ -588,13 +771,9 @@ class Method:
         #
         # Special care must be taken when dealing with operators.
 
-        f = Method(node.cursor.spelling)
-        f.params = [
-            from_node(each)
-            for each in node.get_children()
-            if each.cursor.kind == clang.cindex.CursorKind.PARM_DECL
-        ]
-        tokens = node.get_tokens()
+        f = Method(record.spelling)
+        f.params = [Type.from_record(each) for each in record.params]
+        tokens = list(record.tokens)
         if tokens[0] == "virtual":
             tokens.pop(0)
 
@@ -629,14 +808,11 @@ class Method:
 
         # Const qualifiers, virtual keywords, and exception
         # specifications can be obtained using python clang.
-        f.const = node.cursor.is_const_method()
-        f.virtual = node.cursor.is_virtual_method()
-        f.pure_virtual = node.cursor.is_pure_virtual_method()
-        if (
-            node.cursor.exception_specification_kind
-            == clang.cindex.ExceptionSpecificationKind.BASIC_NOEXCEPT
-        ):  # noqa: E501
-            f.noexcept = True
+        f.const = record.const
+        f.virtual = record.virtual
+        f.pure_virtual = record.pure_virtual
+        f.noexcept = record.noexcept
+        f.access = record.access
 
         # ``f`` is an operator, if its name matches the following regex.
         if f.name.replace("operator", "") in _OPERATOR_SYMBOLS:
@@ -644,6 +820,13 @@ class Method:
         return f
 
 
+@functools.lru_cache(maxsize=None)
+def _mangle(name: str) -> str:
+    """Replace the operator symbols in ``name`` in a single pass."""
+    return _OPERATOR_REGEX.sub(lambda match: _MANGLED_SYMBOLS[match.group()], name)
+
+
+@utils.add_slots
 @dataclasses.dataclass
 class TypeAlias:
     """For C++ (template and non-template) type aliases.
@@ -652,6 +835,7 @@ class TypeAlias:
         name: The alias
         typedef: The aliased type
         template: The type alias' template decl (if available)
+        access: The type alias' access specifier
 
     Example:
         >>> TypeAlias('Vector', 'std::vector<T>', TemplateDecl(['T']))
@@ -661,6 +845,8 @@ class TypeAlias:
     name: str
     typedef: str
     template: Optional[TemplateDecl] = None
+    # The access specifier is not part of the alias itself.
+    access: str = dataclasses.field(default="public", compare=False)
 
     def __str__(self):
         result = ""
@@ -671,22 +857,22 @@ class TypeAlias:
 
     @classmethod
     def from_node(cls, node: translator.Node) -> TypeAlias:
-        if node.cursor.kind == clang.cindex.CursorKind.TYPE_ALIAS_TEMPLATE_DECL:
-            template = TemplateDecl.from_node(node)
-            node = next(
-                each
-                for each in node.get_children()
-                if each.cursor.kind == clang.cindex.CursorKind.TYPE_ALIAS_DECL
-            )
+        from drmock import translator
+
+        return cls.from_record(translator.extract_type_alias(node))
+
+    @classmethod
+    def from_record(cls, record: records.TypeAliasRecord) -> TypeAlias:
+        if record.template_params is not None:
+            template = TemplateDecl.from_record(record.template_params)
         else:
             template = None
-        result = TypeAlias(
-            node.cursor.spelling, node.cursor.underlying_typedef_type.spelling
-        )
+        result = TypeAlias(record.spelling, record.underlying_type)
         result.template = template
         return result
 
 
+@utils.add_slots
 @dataclasses.dataclass
 class Class:
     """For C++ classes.
@@ -744,51 +930,56 @@ class Class:
         """
         return (self.template is None) and not self.get_type_aliases()
 
-    def __str__(self):
-        result = ""
-
+    def emit(self, emitter: utils.Emitter) -> None:
+        """Write the class' code to ``emitter``."""
         if self.enclosing_namespace:
-            result += " ".join(
-                "namespace " + each + " {" for each in self.enclosing_namespace
+            emitter.write(
+                " ".join("namespace " + each + " {" for each in self.enclosing_namespace)
             )
-            result += "\n"
-            result += "\n"
+            emitter.write("\n")
+            emitter.write("\n")
 
         if self.template:
-            result += str(self.template) + "\n"
+            emitter.write(str(self.template) + "\n")
 
-        result += "class " + self.name + self.final * " final"
+        emitter.write("class " + self.name + self.final * " final")
         if self.parent:  # If self is derived (as C++ class).
-            result += " : public " + self.parent
+            emitter.write(" : public " + self.parent)
 
-        result += "\n"  # End class decl line.
-        result += "{\n"
+        emitter.write("\n")  # End class decl line.
+        emitter.write("{\n")
 
-        result += self.q_object * "  Q_OBJECT\n\n"
+        if self.q_object:
+            emitter.write("  Q_OBJECT\n\n")
 
         access = "private"
         for each in self.members:
             # Observe access specifier change.
             if access != each.access:
                 access = each.access
-                result += "\n"
-                result += each.access + ":\n"
+                emitter.write("\n")
+                emitter.write(each.access + ":\n")
 
-            result += utils.indent(str(each))
-            result += "\n"
+            with emitter.indented():
+                if isinstance(each, (Constructor, Method)):
+                    each.emit(emitter)
+                else:
+                    emitter.write(str(each))
+            emitter.write("\n")
 
-        result += "};"
+        emitter.write("};")
 
         if self.enclosing_namespace:
-            result += "\n\n"
+            emitter.write("\n\n")
             namespace_count = len(self.enclosing_namespace)
-            result += (
+            emitter.write(
                 namespace_count * "}"
                 + " // namespace "
                 + "::".join(self.enclosing_namespace)
             )
 
-        return result
+    def __str__(self):
+        return utils.render(self)
 
     @classmethod
     def from_node(cls, node: translator.Node) -> Class:
@@ -811,55 +1002,33 @@ class Class:
         field variables, etc. will *not* be transcribed into the
         ``Class`` object.
         """
-        assert node.cursor.kind in {
-            clang.cindex.CursorKind.CLASS_DECL,
-            clang.cindex.CursorKind.CLASS_TEMPLATE,
-        }
-        result = cls("T")  # Use temporary class name for init.
-        result.name = node.cursor.spelling
-        if node.cursor.kind == clang.cindex.CursorKind.CLASS_TEMPLATE:
-            result.template = TemplateDecl.from_node(node)
+        from drmock import translator
 
-        access = "private"
-        for each in node.get_children():
-            IGNORED_CURSORS = {
-                clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER,
-                clang.cindex.CursorKind.DESTRUCTOR,
-                clang.cindex.CursorKind.CXX_BASE_SPECIFIER,
-                clang.cindex.CursorKind.USING_DIRECTIVE,
-            }
-            if each.cursor.kind in IGNORED_CURSORS:
-                continue
-
-            # A field decl can mean one of two things: (1) A field in a
-            # non-abstract base class, (2) a macro notification created
-            # by us.
-            if each.cursor.kind == clang.cindex.CursorKind.FIELD_DECL:
-                tokens = each.get_tokens()  # ['int', 'Q_OBJECT'], etc.
-                assert tokens
-                tokens.pop(0)  # ['Q_OBJECT']
-                var = tokens.pop() if tokens else None
-                if var == "Q_OBJECT":
-                    result.q_object = True
-                    continue
-
-            if each.cursor.kind == clang.cindex.CursorKind.CXX_ACCESS_SPEC_DECL:
-                access = _access_spec_decl_from_node(each)
-
-            MEMBER_TYPES = {
-                clang.cindex.CursorKind.CXX_METHOD,
-                clang.cindex.CursorKind.TYPE_ALIAS_TEMPLATE_DECL,
-                clang.cindex.CursorKind.TYPE_ALIAS_DECL,
-            }
-            if each.cursor.kind in MEMBER_TYPES:
-                member = from_node(each)
-                member.access = access
-                result.members.append(member)
+        return cls.from_record(translator.extract_class(node))
+
+    @classmethod
+    def from_record(cls, record: records.ClassRecord) -> Class:
+        """Create ``Class`` object from the record of a class node (see
+        ``from_node``)."""
+        result = cls("T")  # Use temporary class name for init.
+        result.name = record.spelling
+        if record.template_params is not None:
+            result.template = TemplateDecl.from_record(record.template_params)
+        result.q_object = record.q_object
+
+        for each in record.members:
+            if isinstance(each, records.MethodRecord):
+                member = Method.from_record(each)
+            else:
+                member = TypeAlias.from_record(each)
+            member.access = each.access
+            result.members.append(member)
 
         return result
 
 
-@dataclasses.dataclass
+@utils.add_slots
+@dataclasses.dataclass(frozen=True)
 class Variable:
     """For C++ member variable declarations.
 
@@ -885,13 +1054,3 @@ class Variable:
         result += "{" + ", ".join(self.default_args) + "}"
         result += ";"
         return result
-
-
-def _access_spec_decl_from_node(node: translator.Node) -> str:
-    """Get access specifier token from ``ACCESS_SPEC_DECL``."""
-    tokens = node.get_tokens()  # public, protected, private (slots)
-    # Since `slots` and `signals` is #defined as empty, an empty access
-    # spec decl is most likely ``signals:``.
-    if not tokens:
-        return "signals"
-    return tokens[0]
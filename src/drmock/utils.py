@@ -4,9 +4,14 @@
 
 from __future__ import annotations
 
-from typing import Any, Sequence
+from typing import Any, Iterator, Sequence, TextIO
 
+import contextlib
+import dataclasses
+import io
+import os
 import re
+import uuid
 
 INDENT_WIDTH = 2
 
@@ -53,15 +58,16 @@ def split_by_condition(pred, seq: Sequence[_T]) -> list[list[_T]]:
             The sequence to split
 
     Returns:
-        A list which contains the equivalence classes as lists
+        A list which contains the equivalence classes as lists, in the
+        order of their first occurence in ``seq``
+
+    The values of ``pred`` **must** be hashable. ``pred`` is called
+    exactly once per element.
     """
-    # Get values in order of occurence.
-    values = []
+    result: dict[Any, list[_T]] = {}
     for each in seq:
-        val = pred(each)
-        if val not in values:
-            values.append(val)
-    return [[each for each in seq if pred(each) == val] for val in values]
+        result.setdefault(pred(each), []).append(each)
+    return list(result.values())
 
 
 def filter_duplicates(it: Iterator[_T]) -> list[_T]:
@@ -83,5 +89,158 @@ def indent(value: str, depth: int = 1, width: int = INDENT_WIDTH) -> str:
     return result
 
 
+def add_slots(cls: type) -> type:
+    """Class decorator which adds ``__slots__`` to the dataclass ``cls``.
+
+    Slotted instances have no ``__dict__``, which saves memory when
+    many of them are kept alive. This is the equivalent of
+    ``dataclasses.dataclass(slots=True)``, which requires Python 3.10.
+    The decorator **must** be applied on top of
+    ``dataclasses.dataclass``.
+    """
+    namespace = dict(cls.__dict__)
+    names = tuple(each.name for each in dataclasses.fields(cls))
+    namespace["__slots__"] = names
+    for each in names:
+        # Remove the defaults, they're stored in ``__init__``.
+        namespace.pop(each, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    if cls.__dataclass_params__.frozen:
+        # Restoring the state of a copy or a pickle must bypass the
+        # ``__setattr__`` of frozen dataclasses.
+        namespace["__getstate__"] = _get_slots_state
+        namespace["__setstate__"] = _set_slots_state
+    result = type(cls)(cls.__name__, cls.__bases__, namespace)
+    result.__qualname__ = cls.__qualname__
+    return result
+
+
+def _get_slots_state(self) -> list[Any]:
+    return [getattr(self, each) for each in self.__slots__]
+
+
+def _set_slots_state(self, state: list[Any]) -> None:
+    for name, value in zip(self.__slots__, state):
+        object.__setattr__(self, name, value)
+
+
+class Emitter:
+    r"""Writes code to a text stream, indenting it on the fly.
+
+    Text written inside ``indented`` is indented the same way as by
+    ``indent``, but without building an indented copy of it: nested
+    code (a method body in a method in a class) is written straight to
+    the stream at its final depth.
+
+    >>> buffer = io.StringIO()
+    >>> emitter = Emitter(buffer)
+    >>> emitter.write("{\n")
+    >>> with emitter.indented():
+    ...     emitter.write("foo();\nbar();")
+    >>> emitter.write("\n}")
+    >>> buffer.getvalue()
+    '{\n  foo();\n  bar();\n}'
+    """
+
+    def __init__(self, stream: TextIO, width: int = INDENT_WIDTH) -> None:
+        """Args:
+        stream: The stream to write to
+        width: Indent width
+        """
+        self._stream = stream
+        self._width = width
+        self._prefix = ""
+        self._line_start = True
+
+    @contextlib.contextmanager
+    def indented(self, depth: int = 1) -> Iterator[None]:
+        """Indent everything written in the ``with`` block by another
+        ``depth`` levels."""
+        prefix = self._prefix
+        self._prefix += depth * self._width * " "
+        try:
+            yield
+        finally:
+            self._prefix = prefix
+
+    def write(self, text: str) -> None:
+        """Write ``text`` at the current depth.
+
+        The indent of a line is written along with the first text of the
+        line (even if that text is empty), so a line which is started
+        at one depth may be continued at another depth.
+        """
+        lines = text.split("\n")
+        for i, line in enumerate(lines):
+            if i:
+                self._stream.write("\n")
+                self._line_start = True
+                if not line and i == len(lines) - 1:
+                    break  # Leave the indent to the next line's depth.
+            if self._line_start:
+                self._stream.write(self._prefix)
+                self._line_start = False
+            self._stream.write(line)
+
+
+def render(obj: Any) -> str:
+    """Return the code that ``obj.emit`` writes to an ``Emitter``."""
+    buffer = io.StringIO()
+    obj.emit(Emitter(buffer))
+    return buffer.getvalue()
+
+
+def write_atomic(path: str, content: str) -> None:
+    """Write ``content`` to a temporary file and move it to ``path``.
+
+    Concurrent readers see either the old or the new content of
+    ``path``, never a partially written file. Note that if ``path`` is
+    a symlink, the link is replaced with a regular file.
+
+    Raises:
+        DrMockRuntimeError: If writing or moving the file fails
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = os.path.join(directory, f".drmock-{uuid.uuid4().hex}.tmp")
+    try:
+        # Unlike ``mkstemp``, pass the mode of a file created using
+        # ``open`` and let the OS apply the umask (changing the umask
+        # would affect all threads).
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    except OSError as e:
+        raise DrMockRuntimeError(str(e))
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """Atomically write ``content`` to ``path`` unless ``path`` already
+    has that content.
+
+    Leaving unchanged files untouched preserves their mtime, so that
+    build systems don't consider them out of date.
+
+    Returns:
+        ``True`` if ``path`` was written, ``False`` otherwise
+
+    Raises:
+        DrMockRuntimeError: If writing the file fails
+    """
+    try:
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass  # Missing or unreadable files are (over)written.
+    write_atomic(path, content)
+    return True
+
+
 class DrMockRuntimeError(Exception):
     pass
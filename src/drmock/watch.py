@@ -0,0 +1,133 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""For regenerating mocks whenever their input headers change.
+
+``watch`` polls the modification times of the input headers and of all
+files that they include. The translation unit of each input header is
+kept alive between changes: Instead of parsing the header from scratch,
+the translation unit is reparsed with the new content of the header,
+which reuses the precompiled preamble (the leading includes) unless
+the preamble itself has changed. Only the mocks of the headers which
+changed (or whose includes changed) are regenerated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Optional, Sequence
+
+from drmock import generator
+from drmock import translator
+from drmock import utils
+
+
+class Watcher:
+    """Watches the input header of one set of commandline arguments."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Args:
+        args: Holds the commandline arguments
+        """
+        self._args = generator.resolve_flags(args)
+        self._root: Optional[translator.Node] = None
+        self._mtimes: dict[str, Optional[int]] = {}
+
+    @property
+    def input_path(self) -> str:
+        return self._args.input_path
+
+    def poll(self) -> list[str]:
+        """Regenerate the mocks if the input header or any of the files
+        it includes was modified since the last call.
+
+        The first call always generates the mocks.
+
+        Returns:
+            The paths of the files which were actually written
+
+        Raises:
+            utils.DrMockRuntimeError:
+                If generating the mocks fails; the next call retries
+                only if a file was modified in the meantime
+        """
+        args = self._args
+        input_path = os.path.abspath(args.input_path)
+        if self._mtimes:
+            mtimes = {each: _get_mtime(each) for each in self._mtimes}
+            if mtimes == self._mtimes:
+                return []
+        else:
+            mtimes = {input_path: _get_mtime(input_path)}
+        # Save the modification times _before_ reading any file, so that
+        # changes made during the regeneration trigger the next one.
+        self._mtimes = mtimes
+
+        header = generator.read_input(args)
+        if self._root is None:
+            generator.set_library_file(args)
+            self._root = translator.translate(
+                args.input_path,
+                header,
+                args.flags,
+                profile=args.parse_profile,
+                reparsable=True,
+            )
+        else:
+            self._root = translator.reparse(self._root, header)
+        mocks, dependencies = generator.generate_mocks(args, self._root)
+        self._mtimes = {
+            each: mtimes[each] if each in mtimes else _get_mtime(each)
+            for each in [input_path] + dependencies
+        }
+        return generator.write_mocks(args, mocks, dependencies)
+
+
+def poll(watchers: Sequence[Watcher]) -> int:
+    """Poll all ``watchers`` and return the number of failures.
+
+    Errors are reported on ``stderr``.
+    """
+    failures = 0
+    for each in watchers:
+        try:
+            each.poll()
+        except utils.DrMockRuntimeError as e:
+            print(
+                f"drmock-generator: error: {each.input_path}: {e}\n",
+                file=sys.stderr,
+            )
+            failures += 1
+    return failures
+
+
+def watch(entries: Sequence[argparse.Namespace], interval: float = 0.5) -> None:
+    """Regenerate the mocks of ``entries`` on every change until
+    interrupted.
+
+    Args:
+        entries: Hold the commandline arguments of each input header
+        interval: The time between two polls in seconds
+    """
+    watchers = [Watcher(each) for each in entries]
+    print(
+        f"drmock-generator: watching {len(watchers)} header(s); press Ctrl+C to stop",
+        file=sys.stderr,
+    )
+    try:
+        while True:
+            poll(watchers)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def _get_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
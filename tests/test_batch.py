@@ -0,0 +1,186 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+
+import pytest
+
+from drmock import batch
+from drmock import commandline
+from drmock import generator
+from drmock import utils
+
+
+class TestReadManifest:
+    def test_lines(self, tmp_path):
+        path = tmp_path / "manifest.txt"
+        path.write_text(
+            "# Comment\n"
+            "\n"
+            "IFoo.h FooMock.h -i IFoo --flags --std=c++17\n"
+            "'I Bar.h' BarMock.h -n ns\n"
+        )
+        entries = batch.read_manifest(str(path), commandline.parse_args)
+        assert [(each.input_path, each.output_path) for each in entries] == [
+            ("IFoo.h", "FooMock.h"),
+            ("I Bar.h", "BarMock.h"),
+        ]
+        assert entries[0].input_class == "IFoo"
+        assert entries[0].flags[:1] == ["--std=c++17"]
+        assert entries[1].namespace == "ns"
+
+    def test_json(self, tmp_path):
+        path = tmp_path / "manifest.json"
+        path.write_text(
+            json.dumps(
+                [
+                    {
+                        "input_path": "IFoo.h",
+                        "output_path": "FooMock.h",
+                        "input_class": "IFoo",
+                        "all_classes": True,
+                        "flags": ["--std=c++17", "-fPIC"],
+                    },
+                    ["IBar.h", "BarMock.h", "-c", "ctrl"],
+                ]
+            )
+        )
+        entries = batch.read_manifest(str(path), commandline.parse_args)
+        assert entries[0].input_path == "IFoo.h"
+        assert entries[0].input_class == "IFoo"
+        assert entries[0].all_classes
+        assert entries[0].flags[:2] == ["--std=c++17", "-fPIC"]
+        assert entries[1].output_path == "BarMock.h"
+        assert entries[1].controller == "ctrl"
+
+    @pytest.mark.parametrize(
+        "name, content",
+        [
+            ("manifest.json", "{"),
+            ("manifest.json", '{"input_path": "IFoo.h"}'),
+        ],
+    )
+    def test_failure(self, tmp_path, name, content):
+        path = tmp_path / name
+        path.write_text(content)
+        with pytest.raises(utils.DrMockRuntimeError):
+            batch.read_manifest(str(path), commandline.parse_args)
+
+    @pytest.mark.parametrize(
+        "name, content, location",
+        [
+            ("manifest.json", '[["a.h", "b.h"], {"output_path": "b.h"}]', ": entry 1"),
+            ("manifest.json", '[["a.h", "b.h"], ["a.h", "-j", ""]]', ": entry 1"),
+            ("manifest.txt", "a.h b.h\n\na.h\n", ":3"),
+            ("manifest.txt", "a.h b.h\na.h 'b.h\n", ":2"),
+        ],
+    )
+    def test_invalid_entry(self, tmp_path, name, content, location):
+        path = tmp_path / name
+        path.write_text(content)
+        entries = batch.read_manifest(str(path), commandline.parse_args)
+        assert len(entries) == 2
+        assert entries[0].input_path == "a.h"
+        assert isinstance(entries[1], batch.InvalidEntry)
+        assert entries[1].location == str(path) + location
+        assert entries[1].error
+
+
+def test_run(mocker, capsys):
+    entries = [mocker.Mock(input_path=f"I{i}.h") for i in range(3)]
+    mocker.patch.object(
+        generator,
+        "main",
+        side_effect=[None, utils.DrMockRuntimeError("boom"), None],
+    )
+    assert batch.run(entries) == 1
+    assert generator.main.call_count == 3
+    captured = capsys.readouterr()
+    assert "drmock-generator: error: I1.h: boom" in captured.err
+    assert "1 of 3 entries failed" in captured.err
+
+
+def test_snapshot(tmp_path, script_runner):
+    PATH = "resources/example.h"
+    manifest = tmp_path / "manifest.txt"
+    outputs = [tmp_path / f"example_mock_{i}.h" for i in range(2)]
+    manifest.write_text(
+        "".join(
+            f"{PATH} {each} -i Derived -o DerivedMock -n ns -c ctrl --flags --std=c++17\n"
+            for each in outputs
+        )
+        + f"{PATH} {tmp_path / 'failure.h'} -i NoSuchClass --flags --std=c++17\n"
+    )
+    ret = script_runner.run(["drmock-generator", "--batch", str(manifest)])
+    assert ret.returncode == 1
+    assert "NoSuchClass" in ret.stderr
+    with open("resources/example_mock.h") as f:
+        expected = f.read().replace("@PATH@", os.path.abspath(PATH))
+    for each in outputs:
+        assert each.read_text() == expected
+
+
+def test_snapshot_invalid_entry(tmp_path, script_runner):
+    PATH = "resources/example.h"
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text(
+        f"{PATH} {tmp_path / 'mock0.h'} -i (Derived) --flags --std=c++17\n"
+        f"{PATH} --no-such-option\n"
+        f"{PATH} {tmp_path / 'mock1.h'} -i (Derived) --flags --std=c++17\n"
+    )
+    ret = script_runner.run(["drmock-generator", "--batch", str(manifest)])
+    assert ret.returncode == 1
+    assert f"{manifest}:2: unrecognized arguments: --no-such-option" in ret.stderr
+    assert "usage" not in ret.stderr
+    assert "1 of 3 entries failed" in ret.stderr
+    assert (tmp_path / "mock0.h").exists()
+    assert (tmp_path / "mock1.h").exists()
+
+
+@pytest.mark.parametrize("jobs", [0, 3])
+def test_run_parallel(tmp_path, capsys, jobs):
+    PATH = "resources/example.h"
+    argvs = [
+        [PATH, str(tmp_path / "mock0.h"), "-i", "(Derived)", "-v"],
+        [PATH, str(tmp_path / "mock1.h"), "-i", "NoSuchClass"],
+        [PATH, str(tmp_path / "mock2.h"), "-i", "(Derived)", "-v"],
+        ["does_not_exist.h", str(tmp_path / "mock3.h")],
+    ]
+    entries = [
+        commandline.parse_args(each + ["--flags", "--std=c++17"]) for each in argvs
+    ]
+    assert batch.run(entries, jobs, os.environ["CLANG_LIBRARY_FILE"]) == 1
+    captured = capsys.readouterr()
+    errors = [each for each in captured.err.splitlines() if "error" in each]
+    assert len(errors) == 2
+    assert "NoSuchClass" in errors[0]
+    assert "does_not_exist.h" in errors[1]
+    assert "2 of 4 entries failed" in captured.err
+    updated = [each for each in captured.out.splitlines() if "updated" in each]
+    assert "mock0.h" in updated[0]
+    assert "mock2.h" in updated[1]
+
+
+def test_batch_defaults(tmp_path, mocker):
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("foo.h foo_mock.h\nbar.h bar_mock.h --cache-dir entry\n")
+    argv = ["drmock-generator", "--batch", str(manifest), "--cache-dir", "batch"]
+    argv += ["--pch-cache", "pch", "-p", "fast", "--depfile", "--single-file", "-v"]
+    mocker.patch("sys.argv", argv)
+    run = mocker.patch("drmock.batch.run", return_value=0)
+    with pytest.raises(SystemExit):
+        commandline.main()
+    foo, bar = run.call_args[0][0]
+    assert foo.cache_dir == "batch"
+    assert bar.cache_dir == "entry"
+    for each in [foo, bar]:
+        assert each.pch_cache == "pch"
+        assert each.parse_profile == "fast"
+        assert each.depfile and each.single_file and each.verbose
+
+
+def test_batch_flags():
+    with pytest.raises(SystemExit):
+        commandline.parse_args(["--batch", "manifest.txt", "--flags", "-std=c++17"])
@@ -0,0 +1,138 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+
+import pytest
+
+from drmock import cache
+from drmock import commandline
+from drmock import generator
+from drmock import translator
+
+PATH = "resources/example.h"
+
+
+def _parse_args(*args):
+    return commandline.parse_args(list(args))
+
+
+class TestGetKey:
+    def test_output_path_independent(self):
+        args1 = _parse_args(PATH, "a/mock.h")
+        args2 = _parse_args(PATH, "b/mock.h")
+        assert cache.get_key(args1, "source", []) == cache.get_key(
+            args2, "source", []
+        )
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            [PATH, "mock.h", "-i", "Foo"],
+            [PATH, "mock.h", "-o", "Foo"],
+            [PATH, "mock.h", "-n", "ns"],
+            [PATH, "mock.h", "-c", "ctrl"],
+            [PATH, "mock.h", "-a", "public"],
+            [PATH, "mock.h", "-l", "libclang.so"],
+            ["other.h", "mock.h"],
+            [PATH, "mock.h", "--flags", "-DFOO"],
+            [PATH, "mock.h", "--all-classes"],
+        ],
+    )
+    def test_options(self, args):
+        expected = cache.get_key(_parse_args(PATH, "mock.h"), "source", [])
+        assert cache.get_key(_parse_args(*args), "source", []) != expected
+
+    def test_library_fingerprint(self, tmp_path, mocker):
+        library = tmp_path / "libclang.so"
+        library.write_bytes(b"abc")
+        args = _parse_args(PATH, "mock.h", "-l", str(library))
+        args.cache_dir = str(tmp_path / "cache")
+        expected = cache.get_key(args, "source", [])
+        os.utime(library, ns=(0, 1))
+        get_digest = mocker.spy(cache, "_get_digest")
+        assert cache.get_key(args, "source", []) == expected
+        assert cache.get_key(args, "source", []) == expected
+        assert get_digest.call_count == 1  # The digest is memoized.
+        library.write_bytes(b"xyz")
+        assert cache.get_key(args, "source", []) != expected
+
+    def test_source(self):
+        args = _parse_args(PATH, "mock.h")
+        assert cache.get_key(args, "source", []) != cache.get_key(args, "other", [])
+        assert cache.get_key(args, "source", []) != cache.get_key(
+            args, "source", ["Q_OBJECT"]
+        )
+
+
+class TestCache:
+    def test_store_and_load(self, tmp_path):
+        mock_cache = cache.Cache(str(tmp_path))
+        source = '#include "build1/mock.h"\n\ntemplate class Foo;'
+        mock_cache.store("abc", [("Foo", "build1/mock.h", "header", source)])
+        assert mock_cache.load("abc", lambda name: f"build2/{name}.h") == (
+            [
+                (
+                    "Foo",
+                    "build2/Foo.h",
+                    "header",
+                    '#include "build2/Foo.h"\n\ntemplate class Foo;',
+                )
+            ],
+            [],
+        )
+
+    def test_load_dependency_modified(self, tmp_path):
+        mock_cache = cache.Cache(str(tmp_path / "cache"))
+        dependency = tmp_path / "dependency.h"
+        dependency.write_text("abc")
+        os.utime(dependency, ns=(0, 0))
+        mock_cache.store("abc", [("Foo", "mock.h", "", "")], [str(dependency)])
+        assert mock_cache.load("abc", lambda name: "mock.h")[1] == [str(dependency)]
+        dependency.write_text("xyz")
+        assert mock_cache.load("abc", lambda name: "mock.h") is None
+
+    def test_load_dependency_touched(self, tmp_path, mocker):
+        mock_cache = cache.Cache(str(tmp_path / "cache"))
+        dependency = tmp_path / "dependency.h"
+        dependency.write_text("abc")
+        mock_cache.store("abc", [("Foo", "mock.h", "", "")], [str(dependency)])
+        os.utime(dependency, ns=(0, 1))  # As after a fresh checkout.
+        get_digest = mocker.spy(cache, "_get_digest")
+        assert mock_cache.load("abc", lambda name: "mock.h")[1] == [str(dependency)]
+        assert get_digest.call_count == 1
+        assert mock_cache.load("abc", lambda name: "mock.h")[1] == [str(dependency)]
+        assert get_digest.call_count == 1  # The new mtime was stored.
+
+    def test_load_dependency_missing(self, tmp_path):
+        mock_cache = cache.Cache(str(tmp_path / "cache"))
+        dependency = tmp_path / "dependency.h"
+        mock_cache.store("abc", [("Foo", "mock.h", "", "")], [str(dependency)])
+        assert mock_cache.load("abc", lambda name: "mock.h") is not None
+        dependency.write_text("")
+        assert mock_cache.load("abc", lambda name: "mock.h") is None
+
+    def test_load_miss(self, tmp_path):
+        mock_cache = cache.Cache(str(tmp_path))
+        assert mock_cache.load("abc", lambda name: "mock.h") is None
+        os.makedirs(tmp_path / "ab")
+        (tmp_path / "ab" / "abc.json").write_text("{")
+        assert mock_cache.load("abc", lambda name: "mock.h") is None
+
+
+def test_generator_main(tmp_path, mocker):
+    argv = ["-i", "Derived", "-o", "DerivedMock", "-n", "ns", "-c", "ctrl"]
+    argv += ["--cache-dir", str(tmp_path / "cache"), "--flags", "--std=c++17"]
+    output1 = str(tmp_path / "build1" / "example_mock.h")
+    output2 = str(tmp_path / "build2" / "example_mock.h")
+    os.makedirs(os.path.dirname(output1))
+    os.makedirs(os.path.dirname(output2))
+
+    generator.main(_parse_args(PATH, output1, *argv))
+    translate = mocker.spy(translator, "translate")
+    generator.main(_parse_args(PATH, output2, *argv))
+    translate.assert_not_called()
+
+    with open(output1) as f1, open(output2) as f2:
+        assert f1.read() == f2.read()
@@ -4,6 +4,8 @@
 
 import tempfile
 import os
+import subprocess
+import sys
 
 import pytest
 
@@ -41,7 +43,7 @@ def test_snapshot(script_runner):
 
 def test_success(monkeypatch, mocker, script_runner):
     flags = [" --std=c++17", "-fPIC"]
-    args = mocker.Mock(flags=flags)
+    args = mocker.Mock(flags=flags, batch=None, serve=None, connect=None, watch=False)
     monkeypatch.setattr(commandline, "parse_args", mocker.Mock(return_value=args))
     monkeypatch.setattr(generator, "main", mocker.Mock())
     ret = script_runner.run("drmock-generator")
@@ -58,7 +60,7 @@ def test_parser_fails(monkeypatch, mocker, script_runner):
 
 def test_failure(monkeypatch, mocker, script_runner):
     flags = [" --std=c++17", "-fPIC"]
-    args = mocker.Mock(flags=flags)
+    args = mocker.Mock(flags=flags, batch=None, serve=None, connect=None, watch=False)
     monkeypatch.setattr(commandline, "parse_args", mocker.Mock(return_value=args))
     monkeypatch.setattr(
         generator, "main", mocker.Mock(side_effect=utils.DrMockRuntimeError())
@@ -75,10 +77,19 @@ def test_failure(monkeypatch, mocker, script_runner):
 )
 def test_panic(error, monkeypatch, mocker, script_runner):
     flags = [" --std=c++17", "-fPIC"]
-    args = mocker.Mock(flags=flags)
+    args = mocker.Mock(flags=flags, batch=None, serve=None, connect=None, watch=False)
     monkeypatch.setattr(commandline, "parse_args", mocker.Mock(return_value=args))
     monkeypatch.setattr(generator, "main", mocker.Mock(side_effect=error))
     ret = script_runner.run("drmock-generator", print_result=False)
     assert not ret.success
     assert ret.stderr.startswith("Traceback")
     assert generator.main.called_once_with(args)
+
+
+def test_import_does_not_load_clang():
+    code = (
+        "import sys; from drmock import commandline;"
+        " assert 'clang.cindex' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+
+import pytest
+
+from drmock import commandline
+from drmock import compdb
+from drmock import generator
+from drmock import translator
+from drmock import utils
+
+
+@pytest.mark.parametrize(
+    "arguments, expected",
+    [
+        (
+            ["c++", "-c", "-o", "foo.o", "foo.cpp", "-DFOO", "--std=c++17"],
+            ["-DFOO", "--std=c++17"],
+        ),
+        (
+            ["c++", "-Iinclude", "-I", "../lib", "-isystem", "/usr/include/qt"],
+            ["-I/build/include", "-I", "/lib", "-isystem", "/usr/include/qt"],
+        ),
+        (
+            ["c++", "-MD", "-MT", "foo.o", "-MF", "foo.d", "-ofoo.o", "-fPIC"],
+            ["-fPIC"],
+        ),
+        (["c++", "--sysroot=sdk", "/build/foo.cpp"], ["--sysroot=/build/sdk"]),
+        (
+            ["c++", "-include-pch", "p.pch", "-includeconfig.h", "-include", "a.h"],
+            ["-include/build/config.h", "-include", "/build/a.h"],
+        ),
+        (["c++", "-isystem-afterlib", "-isysroot"], ["-isystem-after/build/lib"]),
+        (
+            ["ccache", "clang++", "-Iinc", "-c", "foo.cpp", "-o", "foo.o"],
+            ["-I/build/inc"],
+        ),
+        (["/usr/bin/sccache", "/usr/bin/g++", "-DFOO"], ["-DFOO"]),
+    ],
+)
+def test_normalize(arguments, expected):
+    assert compdb.normalize(arguments, "/build", "/build/foo.cpp") == expected
+
+
+class TestDatabase:
+    ENTRIES = [
+        {"directory": "/build", "file": "/src/a/a.cpp", "command": "c++ -DA -c ../src/a/a.cpp"},
+        {"directory": "/build", "file": "/src/a/b/b.c", "arguments": ["cc", "-DB"]},
+        {"directory": "/build", "file": "/src/c/c.cpp", "arguments": ["c++", "-DC"]},
+        {"directory": "/build", "file": "/src/c/c.h", "arguments": ["c++", "-DH"]},
+    ]
+
+    @pytest.mark.parametrize(
+        "path, expected",
+        [
+            ("/src/a/IFoo.h", ["-DA"]),
+            ("/src/a/b/IFoo.h", ["-DA"]),  # C sources are skipped.
+            ("/src/c/IFoo.h", ["-DC"]),
+            ("/src/c/c.h", ["-DH"]),
+            ("/other/IFoo.h", ["-DA"]),
+        ],
+    )
+    def test_get_flags(self, path, expected):
+        database = compdb.Database(self.ENTRIES)
+        assert database.get_flags(path) == expected
+
+    def test_get_flags_empty(self):
+        assert compdb.Database([]).get_flags("/src/IFoo.h") == []
+
+    def test_invalid(self):
+        with pytest.raises(utils.DrMockRuntimeError):
+            compdb.Database([{"file": "foo.cpp"}])
+
+
+def test_load(tmp_path):
+    path = tmp_path / compdb.FILE_NAME
+    path.write_text(json.dumps(TestDatabase.ENTRIES))
+    database = compdb.load(str(tmp_path))
+    assert compdb.load(str(path)) is database
+    with pytest.raises(utils.DrMockRuntimeError):
+        compdb.load(str(tmp_path / "nothing.json"))
+
+
+def test_generator_main(tmp_path, mocker):
+    PATH = "resources/example.h"
+    database = tmp_path / compdb.FILE_NAME
+    entry = {
+        "directory": os.getcwd(),
+        "file": "resources/example.cpp",
+        "arguments": ["c++", "--std=c++17", "-c", "resources/example.cpp"],
+    }
+    database.write_text(json.dumps([entry]))
+    args = commandline.parse_args(
+        [PATH, str(tmp_path / "mock.h"), "-i", "(Derived)", "--compile-commands",
+         str(database), "--flags", "-DFOO"]
+    )  # fmt: skip
+    flags = args.flags[:]
+    translate = mocker.spy(translator, "translate")
+    generator.main(args)
+    assert translate.call_args[0][2] == ["--std=c++17"] + flags
+    assert args.flags == flags
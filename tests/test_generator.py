@@ -2,10 +2,16 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import os
+
 import pytest
 
+from drmock import commandline
 from drmock import types
 from drmock import generator
+from drmock import overload
+from drmock import translator
+from drmock import utils
 
 
 @pytest.mark.skip
@@ -87,3 +93,142 @@ def test_explicit_instantiation_definition(expr, expected):
 def test_generate_method_template(parent, return_type, params, expected):
     method = types.Method(name="f", return_type=return_type, params=params)
     assert generator._generate_method_template(parent, method) == expected
+
+
+def test_main_write_if_changed(tmp_path, capsys):
+    output = tmp_path / "example_mock.h"
+    args = commandline.parse_args(
+        [
+            "resources/example.h",
+            str(output),
+            "-i",
+            "Derived",
+            "-o",
+            "DerivedMock",
+            "-v",
+            "--flags",
+            "--std=c++17",
+        ]
+    )
+    assert generator.main(args) == [str(output), str(tmp_path / "example_mock.cpp")]
+    os.utime(output, (0, 0))
+    assert generator.main(args) == []
+    assert os.stat(output).st_mtime == 0
+    assert "output unchanged" in capsys.readouterr().out
+
+
+class TestAllClasses:
+    SOURCE = (
+        "namespace ns {\n"
+        "class IFoo { public: virtual void f() = 0; };\n"
+        "class IBar { public: virtual int g(float) const = 0; };\n"
+        "class Helper {};\n"
+        "}\n"
+    )
+
+    def _parse_args(self, tmp_path, output_path, *args):
+        input_path = tmp_path / "IShapes.h"
+        input_path.write_text(self.SOURCE)
+        return commandline.parse_args(
+            [str(input_path), str(tmp_path / output_path), "--all-classes"]
+            + list(args)
+            + ["--flags", "--std=c++17"]
+        )
+
+    def test_main(self, tmp_path, mocker):
+        args = self._parse_args(tmp_path, r"\1Mock.h", "-i", "I(.*)")
+        translate = mocker.spy(translator, "translate")
+        generator.main(args)
+        assert translate.call_count == 1
+        for name in ["Foo", "Bar"]:
+            header = (tmp_path / f"{name}Mock.h").read_text()
+            assert f"class Mock{name}" in header
+            source = (tmp_path / f"{name}Mock.cpp").read_text()
+            assert str(tmp_path / f"{name}Mock.h") in source
+        assert not (tmp_path / "HelperMock.h").exists()
+
+    def test_main_collision(self, tmp_path):
+        args = self._parse_args(tmp_path, "Mock.h", "-i", "I(.*)")
+        with pytest.raises(utils.DrMockRuntimeError):
+            generator.main(args)
+
+    def test_main_collision_cache_hit(self, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        args = self._parse_args(
+            tmp_path, r"\1Mock.h", "-i", "I(.*)", "--cache-dir", cache_dir
+        )
+        generator.main(args)
+        args = self._parse_args(
+            tmp_path, "Mock.h", "-i", "I(.*)", "--cache-dir", cache_dir
+        )
+        with pytest.raises(utils.DrMockRuntimeError):
+            generator.main(args)
+        assert not (tmp_path / "Mock.h").exists()
+
+    def test_main_no_capture_group(self, tmp_path):
+        args = self._parse_args(tmp_path, r"\1Mock.h", "-i", "I.*", "-o", "Mock")
+        with pytest.raises(utils.DrMockRuntimeError):
+            generator.main(args)
+
+
+def test_generate_depfile():
+    assert generator._generate_depfile(
+        ["mock.h", "mock.cpp"], ["/src/IFoo.h", "/my dir/#1.h", "/$.h"]
+    ) == ("mock.h mock.cpp: \\\n /src/IFoo.h \\\n /my\\ dir/\\#1.h \\\n /$$.h\n")
+
+
+def test_main_depfile(tmp_path):
+    (tmp_path / "base.h").write_text("class Base { public: virtual void f() = 0; };")
+    (tmp_path / "IFoo.h").write_text('#include "base.h"\nclass IFoo : public Base {};')
+    args = commandline.parse_args(
+        [str(tmp_path / "IFoo.h"), str(tmp_path / "FooMock.h"), "-i", "(IFoo)",
+         "--depfile", "--cache-dir", str(tmp_path / "cache")]
+    )  # fmt: skip
+    for _ in range(2):  # Generate, then load from the cache.
+        generator.main(args)
+        assert (tmp_path / "FooMock.d").read_text() == (
+            f"{tmp_path}/FooMock.h {tmp_path}/FooMock.cpp: \\\n"
+            f" {tmp_path}/IFoo.h \\\n"
+            f" {tmp_path}/base.h\n"
+        )
+
+
+@pytest.mark.parametrize(
+    "source, calls",
+    [
+        ("class Bar;\nclass IFoo { virtual Bar* f(int) = 0; };\n", 1),
+        ("class IFoo { virtual Base* f(int) = 0; };\n", 2),  # Fall back.
+    ],
+)
+def test_main_single_file(tmp_path, mocker, source, calls):
+    (tmp_path / "base.h").write_text("class Base {};\nclass Bar;\n")
+    (tmp_path / "IFoo.h").write_text('#include "base.h"\n' + source)
+    argv = [str(tmp_path / "IFoo.h"), "-i", "I(.*)", "--flags", "--std=c++17"]
+    translate = mocker.spy(translator, "translate")
+    generator.main(
+        commandline.parse_args(argv[:1] + [str(tmp_path / "a.h")] + argv[1:])
+    )
+    assert translate.call_count == 1
+    generator.main(
+        commandline.parse_args(
+            argv[:1] + [str(tmp_path / "b.h"), "--single-file"] + argv[1:]
+        )
+    )
+    assert translate.call_count == 1 + calls
+    assert (tmp_path / "a.h").read_text() == (tmp_path / "b.h").read_text()
+
+
+def test_main_analyzes_class_once(tmp_path, mocker):
+    (tmp_path / "IFoo.h").write_text(
+        "class IFoo { public: virtual void f() = 0; virtual int f() const = 0;"
+        " virtual void g(const int &) = 0; };"
+    )
+    args = commandline.parse_args(
+        [str(tmp_path / "IFoo.h"), str(tmp_path / "FooMock.h"), "-i", "(IFoo)"]
+    )
+    get_overloads = mocker.spy(overload, "get_overloads_of_class")
+    get_template = mocker.spy(generator, "_generate_method_template")
+    generator.main(args)
+    assert get_overloads.call_count == 1
+    assert get_template.call_count == 3
+    assert (tmp_path / "FooMock.cpp").read_text().count("template class") == 3
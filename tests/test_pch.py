@@ -0,0 +1,126 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+
+import pytest
+
+from drmock import pch
+from drmock import translator
+from drmock import utils
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        ("", []),
+        ("class A {};", []),
+        (
+            "// Comment\n"
+            "/* Block\n"
+            "   comment */\n"
+            "#ifndef GUARD_H\n"
+            "#define GUARD_H\n"
+            "\n"
+            "#include <vector>\n"
+            "  #  include <QObject>\n"
+            '#include "local.h"\n'
+            "#include <string>\n",
+            ["#include <vector>", "#  include <QObject>"],
+        ),
+        ("#pragma once\n#include <memory>\nclass A {};", ["#include <memory>"]),
+        ("#define NOMINMAX\n#include <windows.h>\n", []),
+        ("#include <a.h>\n#define FOO\n#include <b.h>\n", ["#include <a.h>"]),
+    ],
+)
+def test_get_include_prefix(source, expected):
+    assert pch.get_include_prefix(source) == expected
+
+
+class TestCache:
+    @pytest.fixture
+    def include_dir(self, tmp_path):
+        path = tmp_path / "include"
+        path.mkdir()
+        (path / "base.h").write_text(
+            "#ifndef BASE_H\n#define BASE_H\nclass Base {};\n#endif\n"
+        )
+        return path
+
+    def test_get(self, set_library_file, tmp_path, include_dir):
+        cache = pch.Cache(str(tmp_path / "cache"))
+        index = translator.get_session().index
+        flags = ["--std=c++11", "-I", str(include_dir)]
+        source = "#include <base.h>\nclass A : public Base {};"
+        path = cache.get(index, flags, source)
+        assert os.path.isfile(path)
+        assert cache.get(index, flags, "#include <base.h>\nclass B {};") == path
+        assert cache.get(index, flags + ["-DFOO"], source) != path
+        assert cache.get(index, flags, "class A {};") is None
+
+    def test_get_failure(self, set_library_file, tmp_path):
+        cache = pch.Cache(str(tmp_path / "cache"))
+        index = translator.get_session().index
+        assert cache.get(index, [], "#include <no_such_header.h>\n") is None
+
+    def test_translate(self, set_library_file, tmp_path, include_dir):
+        cache = pch.Cache(str(tmp_path / "cache"))
+        flags = ["--std=c++11", "-I", str(include_dir)]
+        source = "#include <base.h>\nnamespace ns { class A : public Base {}; }"
+        for _ in range(2):  # Build PCH, then reuse it.
+            root = translator.translate("a.h", source, flags, pch_cache=cache)
+            node, namespace = root.find_matching_class("A")
+            assert node.cursor.spelling == "A"
+            assert namespace == ["ns"]
+        files = os.listdir(tmp_path / "cache")
+        assert len([each for each in files if each.endswith(".pch")]) == 1
+
+    def test_translate_included_files(self, set_library_file, tmp_path, include_dir):
+        cache = pch.Cache(str(tmp_path / "cache"))
+        flags = ["--std=c++11", "-I", str(include_dir)]
+        source = "#include <base.h>\nclass A : public Base {};"
+        for _ in range(2):  # Build PCH, then reuse it.
+            root = translator.translate("a.h", source, flags, pch_cache=cache)
+            assert translator.get_included_files(root) == [str(include_dir / "base.h")]
+
+    def test_translate_stale(self, set_library_file, tmp_path, include_dir):
+        cache = pch.Cache(str(tmp_path / "cache"))
+        flags = ["--std=c++11", "-I", str(include_dir)]
+        source = "#include <base.h>\nclass A : public Base {};"
+        translator.translate("a.h", source, flags, pch_cache=cache)
+        (include_dir / "base.h").write_text(
+            "#ifndef BASE_H\n#define BASE_H\nclass Base { int x; };\n#endif\n"
+        )
+        root = translator.translate("a.h", source, flags, pch_cache=cache)
+        node, _ = root.find_matching_class("A")
+        assert node is not None
+
+    def test_translate_error_keeps_pch(self, set_library_file, tmp_path, include_dir):
+        cache = pch.Cache(str(tmp_path / "cache"))
+        flags = ["--std=c++11", "-I", str(include_dir)]
+        source = "#include <base.h>\nclass A {};"
+        translator.translate("a.h", source, flags, pch_cache=cache)
+        files = sorted(os.listdir(tmp_path / "cache"))
+        with pytest.raises(utils.DrMockRuntimeError) as e:
+            translator.translate(
+                "b.h", "#include <base.h>\nclass B { syntax error };", flags,
+                pch_cache=cache,
+            )  # fmt: skip
+        assert "unknown type name 'syntax'" in str(e.value)
+        assert sorted(os.listdir(tmp_path / "cache")) == files
+
+    def test_translate_reject(self, set_library_file, tmp_path, include_dir, mocker):
+        (include_dir / "noguard.h").write_text("class NoGuard {};\n")
+        cache = pch.Cache(str(tmp_path / "cache"))
+        index = translator.get_session().index
+        flags = ["--std=c++11", "-I", str(include_dir)]
+        source = "#include <noguard.h>\nclass A : public NoGuard {};"
+        parse = mocker.spy(index, "parse")
+        for calls in [3, 4]:  # Build, parse with and without PCH; then without.
+            root = translator.translate("a.h", source, flags, pch_cache=cache)
+            assert root.find_matching_class("A")[0] is not None
+            assert parse.call_count == calls
+        assert cache.get(index, flags, source) is None
+        os.utime(include_dir / "noguard.h", ns=(0, 0))
+        assert cache.get(index, flags, source) is not None
@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import concurrent.futures
+import os
+import signal
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+from drmock import commandline
+from drmock import server
+from drmock import utils
+
+PATH = "resources/example.h"
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="the server requires Unix domain sockets"
+)
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "drmock.sock")
+    process = subprocess.Popen(["drmock-generator", "--serve", path])
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+    yield path
+    process.send_signal(signal.SIGINT)
+    assert process.wait(timeout=10) == 0
+    assert not os.path.exists(path)
+
+
+def _parse_args(*args):
+    return commandline.parse_args(list(args))
+
+
+def test_request(socket_path, tmp_path):
+    output = str(tmp_path / "example_mock.h")
+    args = _parse_args(
+        PATH, output, "-i", "Derived", "-o", "DerivedMock", "-n", "ns", "-c", "ctrl",
+        "--flags", "--std=c++17",
+    )  # fmt: skip
+    assert server.request(socket_path, args) == [output, output[:-2] + ".cpp"]
+    with open(output, "r") as f:
+        result = f.read()
+    with open("resources/example_mock.h") as f:
+        expected = f.read().replace("@PATH@", os.path.abspath(PATH))
+    assert result == expected
+
+
+def test_request_concurrent(socket_path, tmp_path):
+    outputs = [str(tmp_path / f"mock{i}.h") for i in range(4)]
+    argss = [
+        _parse_args(PATH, each, "-i", "(Derived)", "--flags", "--std=c++17")
+        for each in outputs
+    ]
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        results = list(executor.map(lambda a: server.request(socket_path, a), argss))
+    assert [each[0] for each in results] == outputs
+
+
+def test_request_failure(socket_path):
+    args = _parse_args("resources/does_not_exist.h", "mock.h")
+    with pytest.raises(utils.DrMockRuntimeError) as e:
+        server.request(socket_path, args)
+    assert "does_not_exist.h" in str(e.value)
+
+
+def test_socket_permissions(socket_path):
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+
+@pytest.mark.parametrize("function", [server.serve, server.request])
+def test_not_supported(monkeypatch, function):
+    monkeypatch.setattr(server, "_SUPPORTED", False)
+    with pytest.raises(utils.DrMockRuntimeError) as e:
+        function("drmock.sock", None)
+    assert "not supported" in str(e.value)
+
+
+def test_request_no_server(tmp_path):
+    args = _parse_args(PATH, "mock.h")
+    with pytest.raises(utils.DrMockRuntimeError):
+        server.request(str(tmp_path / "nothing.sock"), args)
+
+
+def test_connect(socket_path, tmp_path, script_runner):
+    output = str(tmp_path / "example_mock.h")
+    ret = script_runner.run(
+        "drmock-generator", "--connect", socket_path, PATH, output,
+        "-i", "(Derived)", "-v", "-f --std=c++17",
+    )  # fmt: skip
+    assert ret.success
+    assert "updated" in ret.stdout
+    assert os.path.isfile(output)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--serve", "drmock.sock", PATH, "mock.h"],
+        ["--serve", "drmock.sock", "--batch", "manifest.txt"],
+        ["--serve", "drmock.sock", "--connect", "drmock.sock"],
+        ["--connect", "drmock.sock", "--batch", "manifest.txt"],
+        ["--serve", "drmock.sock", "--watch"],
+        ["--connect", "drmock.sock", PATH, "mock.h", "--watch"],
+    ],
+)
+def test_parse_args_invalid(args):
+    with pytest.raises(SystemExit):
+        commandline.parse_args(args)
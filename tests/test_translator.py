@@ -10,6 +10,8 @@ import clang.cindex
 import pytest
 from typing import List, Optional
 
+from drmock import profiles
+from drmock import records
 from drmock import utils
 from drmock import translator
 
@@ -17,6 +19,32 @@ from drmock import translator
 PATH = "virtual_file_name.h"
 
 
+def test_set_library_file_twice(set_library_file):
+    # Libclang is loaded by now, so only the same file is accepted.
+    translator.get_session().index
+    translator.set_library_file(clang.cindex.Config.library_file)
+    with pytest.raises(utils.DrMockRuntimeError):
+        translator.set_library_file("no/such/libclang.so")
+
+
+class TestSession:
+    def test_index_is_created_once(self, set_library_file, mocker):
+        create = mocker.spy(clang.cindex.Index, "create")
+        session = translator.Session()
+        assert session.index is session.index
+        create.assert_called_once_with(False)
+
+    def test_translate_shares_index(self, set_library_file, mocker):
+        session = translator.Session()
+        parse = mocker.spy(session.index, "parse")
+        translator.translate(PATH, "class A {};", ["--std=c++11"], session)
+        translator.translate(PATH, "class B {};", ["--std=c++11"], session)
+        assert parse.call_count == 2
+
+    def test_get_session(self):
+        assert translator.get_session() is translator.get_session()
+
+
 class TestNode:
     @pytest.mark.skip(
         reason="Can't be tested beyond verifying the method's imperative. Moreover, we're using this method thoroughly in the others tests."
@@ -65,6 +93,59 @@ class TestNode:
         assert enclosing_namespace == ["outer", "inner"]
 
 
+    def test_children_from_main_file_only(self, set_library_file, tmp_path):
+        (tmp_path / "included.h").write_text("namespace outer { class _A {}; }")
+        source = (
+            '#include "included.h"\n'
+            "namespace outer {\n"
+            "class B {};\n"
+            "class _C {};\n"
+            "}\n"
+        )
+        root = translator.translate(PATH, source, ["-I", str(tmp_path)])
+        children = root.get_children()
+        assert len(children) == 1
+        assert [each.cursor.spelling for each in children[0].get_children()] == [
+            "B",
+            "_C",
+        ]
+        class_, enclosing_namespace = root.find_matching_class("_[A-Z]")
+        assert class_.cursor.spelling == "_C"
+        assert enclosing_namespace == ["outer"]
+
+    def test_get_included_files(self, set_library_file, tmp_path):
+        (tmp_path / "a.h").write_text('#include "b.h"\n')
+        (tmp_path / "b.h").write_text("")
+        source = '#include "a.h"\n#include "b.h"\n'
+        root = translator.translate(PATH, source, ["-I", str(tmp_path)])
+        assert translator.get_included_files(root) == [
+            str(tmp_path / "a.h"),
+            str(tmp_path / "b.h"),
+        ]
+
+    def test_find_matching_class_no_match(self, set_library_file):
+        root = translator.translate(PATH, "namespace ns { class A {}; }")
+        assert root.find_matching_class("B") == (None, [])
+
+    def test_find_matching_classes(self, set_library_file):
+        source = (
+            "class _A;\n"
+            "namespace outer {\n"
+            "class _B {};\n"
+            "namespace inner { class _C {}; }\n"
+            "class D {};\n"
+            "}\n"
+            "class _A {};\n"
+        )
+        root = translator.translate(PATH, source, ["--std=c++11"])
+        matches = root.find_matching_classes("_[A-Z]")
+        assert [(node.cursor.spelling, ns) for node, ns in matches] == [
+            ("_B", ["outer"]),
+            ("_C", ["outer", "inner"]),
+            ("_A", []),
+        ]
+
+
 class TestTranslate:
     def test_class_template(self, set_library_file):
         root = translator.translate(
@@ -389,6 +470,43 @@ class TestTranslate:
         with pytest.raises(utils.DrMockRuntimeError):
             node = translator.translate(PATH, source, compiler_flags)
 
+    @pytest.mark.parametrize("profile", list(translator.PARSE_PROFILES))
+    def test_profile(self, set_library_file, profile):
+        source = (
+            "class A {\n"
+            "public:\n"
+            "  virtual int f(int x) const { return x + 1; }\n"
+            "};"
+        )
+        root = translator.translate(PATH, source, ["--std=c++11"], profile=profile)
+        node = root.get_children()[0]
+        cxx_method = next(
+            each
+            for each in node.get_children()
+            if each.cursor.kind == clang.cindex.CursorKind.CXX_METHOD
+        )
+        assert cxx_method.cursor.spelling == "f"
+        assert cxx_method.cursor.is_const_method()
+
+    def test_single_file(self, set_library_file, tmp_path):
+        (tmp_path / "included.h").write_text("class Included {};")
+        source = (
+            '#include "included.h"\n'
+            '#include "missing.h"\n'
+            "class A { Included f(); };\n"
+            "class B { void f(); };\n"
+        )
+        root = translator.translate(PATH, source, ["-I", str(tmp_path)], single_file=True)
+        a, _ = root.find_matching_class("A")
+        b, _ = root.find_matching_class("B")
+        assert len(translator.get_errors(a)) == 1
+        assert translator.get_errors(b) == []
+        assert translator.get_included_files(root) == []
+
+    def test_profile_unknown(self, set_library_file):
+        with pytest.raises(utils.DrMockRuntimeError):
+            translator.translate(PATH, "class A {};", profile="no-such-profile")
+
     def test_bug_0(self, set_library_file):
         path = "void_func.h"
         compiler_flags = [
@@ -433,3 +551,107 @@ class TestTranslate:
 
                     #endif /* DRMOCK_TESTS_MOCKER_IVOIDFUNC_H */"""
         translator.translate(path, source, compiler_flags)
+
+
+class TestExtract:
+    def test_extract_class(self, set_library_file):
+        source = (
+            "template<typename T, typename... Ts>\n"
+            "class A {\n"
+            "  int Q_OBJECT;\n"
+            "public:\n"
+            "  using value_type = T;\n"
+            "  template<typename U> using alias = U;\n"
+            "  A();\n"
+            "protected:\n"
+            "  virtual int f(const T* const x, int) const noexcept = 0;\n"
+            "};"
+        )
+        root = translator.translate(PATH, source, ["--std=c++11"])
+        record = translator.extract_class(root.get_children()[0])
+        assert record == records.ClassRecord(
+            spelling="A",
+            template_params=[["typename", "T"], ["typename", "...", "Ts"]],
+            q_object=True,
+            members=[
+                records.TypeAliasRecord("value_type", "T", None, "public"),
+                records.TypeAliasRecord(
+                    "alias", "U", [["typename", "U"]], "public"
+                ),
+                records.MethodRecord(
+                    spelling="f",
+                    tokens=(
+                        "virtual int f ( const T * const x , int ) const noexcept = 0"
+                    ).split(),
+                    params=[
+                        records.ParamRecord(
+                            "x", ["const", "T", "*", "const", "x"], True, False
+                        ),
+                        records.ParamRecord("", ["int"], False, False),
+                    ],
+                    const=True,
+                    virtual=True,
+                    pure_virtual=True,
+                    noexcept=True,
+                    access="protected",
+                ),
+            ],
+        )
+
+
+    def test_extract_class_cached(self, set_library_file):
+        source = (
+            "class A {\n"
+            "public:\n"
+            "  virtual void f(int, float) = 0;\n"
+            "  virtual int g() const = 0;\n"
+            "};"
+        )
+        root = translator.translate(PATH, source, ["--std=c++11"])
+        translator.reset_ffi_calls()
+        node = root.get_children()[0]
+        record = translator.extract_class(node)
+        calls = translator.get_ffi_calls()
+        assert calls["is_virtual_method"] == 2
+        assert calls["spelling"] == 1 + 2 + 2  # Class, methods, params.
+        assert translator.extract_class(node) == record
+        assert translator.get_ffi_calls() == calls
+        translator.reset_ffi_calls()
+        assert translator.get_ffi_calls() == {}
+
+
+class TestTokenBuffer:
+    def test_get_tokens(self, set_library_file):
+        source = (
+            "class Base {};\n"
+            "template<typename T, typename... Ts>\n"
+            "class A : public Base {\n"
+            "  int Q_OBJECT;\n"
+            "public:\n"
+            "  using value_type = T;\n"
+            "  A();\n"
+            "  virtual const int& operator[](int) const volatile noexcept;\n"
+            "  virtual void f(const T*const, Ts&&... ts) && = 0;\n"
+            "  int g(int x) { return x + 1; }\n"
+            "private:\n"
+            "  T value{};\n"
+            "};"
+        )
+        root = translator.translate(PATH, source, ["--std=c++11"])
+        node = root.get_children()[1]
+        buffer = translator.TokenBuffer(node.cursor)
+
+        def visit(each):
+            assert buffer.get_tokens(each) == each.get_tokens()
+            for child in each.get_children():
+                visit(child)
+
+        visit(node)
+
+
+def test_parse_profiles():
+    TU = clang.cindex.TranslationUnit
+    assert profiles.PARSE_NONE == TU.PARSE_NONE
+    assert profiles.PARSE_INCOMPLETE == TU.PARSE_INCOMPLETE
+    assert profiles.PARSE_SKIP_FUNCTION_BODIES == TU.PARSE_SKIP_FUNCTION_BODIES
+    assert translator.PARSE_PROFILES is profiles.PARSE_PROFILES
@@ -2,10 +2,14 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import copy
+import dataclasses
+
 import clang.cindex
 from unittest import mock
 import pytest
 
+from drmock import records
 from drmock import types
 from drmock import translator
 
@@ -100,6 +104,34 @@ class TestType:
     def test_from_tokens(self, tokens, expected):
         assert types.Type.from_tokens(tokens) == expected
 
+    def test_from_tokens_memoized(self):
+        types.Type.from_tokens_cache_clear()
+        tokens = ["const", TYPE, "*", "const", "&"]
+        first = types.Type.from_tokens(tokens)
+        assert tokens == ["const", TYPE, "*", "const", "&"]  # Not modified.
+        assert types.Type.from_tokens(tuple(tokens)) is first
+        info = types.Type.from_tokens_cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    def test_interned(self):
+        type_ = types.Type.from_spelling("const std::string &")
+        inner = types.Type("std::string", const=True)
+        assert type_ is types.Type(inner, lvalue_ref=True)
+        assert type_.inner is inner
+        assert type_ is copy.deepcopy(type_)
+        assert type_.get_decayed() is types.Type("std::string")
+        assert type_.get_decayed() is type_.get_decayed()
+        assert str(type_) is str(type_)
+        assert type_ != types.Type(type_)  # Naked layers are not removed.
+        assert len({type_, types.Type.from_spelling("const std::string &")}) == 1
+
+    def test_immutable(self):
+        type_ = types.Type("int", const=True)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            type_.const = False
+        assert type_.replace(const=False) is types.Type("int")
+        assert type_.const
+
     @pytest.mark.parametrize(
         "type_, expected",
         [
@@ -239,9 +271,9 @@ class TestType:
         c = mocker.Mock()
         c.get_tokens = mocker.Mock()
         c.get_tokens.return_value = tokens
-        c.cursor.spelling = spelling
-        c.cursor.type.is_const_qualified.return_value = const
-        c.cursor.type.is_volatile_qualified.return_value = volatile
+        c.spelling = spelling
+        c.type.is_const_qualified.return_value = const
+        c.type.is_volatile_qualified.return_value = volatile
 
         assert types.Type.from_node(c) == expected
 
@@ -277,16 +309,16 @@ class TestTemplateDecl:
     def test_from_node(self, mocker):
         template_type_param1 = mocker.Mock(
             get_tokens=mocker.Mock(return_value=["typename", "T"]),
-            cursor=mocker.Mock(kind=clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER),
+            kind=clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER,
             spec=translator.Node,
         )
         template_type_param2 = mocker.Mock(
             get_tokens=mocker.Mock(return_value=["typename", "...", "Ts"]),
-            cursor=mocker.Mock(kind=clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER),
+            kind=clang.cindex.CursorKind.TEMPLATE_TYPE_PARAMETER,
             spec=translator.Node,
         )
         decoy = mocker.Mock(
-            cursor=mocker.Mock(kind=clang.cindex.CursorKind.CXX_METHOD),
+            kind=clang.cindex.CursorKind.CXX_METHOD,
             spec=translator.Node,
         )
         parent = mocker.Mock(
@@ -311,6 +343,10 @@ class TestMethod:
             ("operator>=", "operatorGreaterOrEqual"),
             ("operator<<", "operatorStreamLeft"),
             ("operator>>", "operatorStreamRight"),
+            ("operator<<=", "operatorLesserLesserOrEqual"),
+            ("operator>>=", "operatorGreaterGreaterOrEqual"),
+            ("operator+=", "operatorPlusAssign"),
+            ("operator->*", "operatorPointerToMember"),
             ("operator&&", "operatorAnd"),
             ("operator||", "operatorOr"),
             ("operator++", "operatorIncrement"),
@@ -341,6 +377,22 @@ class TestMethod:
         method = types.Method(name)
         assert method.mangled_name() == expected
 
+    @pytest.mark.parametrize(
+        "name, expected",
+        [
+            ("operator==", True),
+            ("operator<<", True),
+            ("operator=", True),
+            ("operator<<=", False),
+            ("operator>>=", False),
+            ("operator+=", False),
+            ("foo", False),
+        ],
+    )
+    def test_from_record_operator(self, name, expected):
+        record = records.MethodRecord(name, ["void", name, "(", ")"])
+        assert types.Method.from_record(record).operator == expected
+
     @pytest.mark.parametrize(
         "method, expected",
         [
@@ -2,6 +2,13 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import copy
+import dataclasses
+import io
+import os
+import stat
+import sys
+
 import pytest
 
 from drmock import utils
@@ -57,6 +64,16 @@ def test_split_by_condition(func, iterator, expected):
     assert sorted(utils.split_by_condition(func, iterator)) == sorted(expected)
 
 
+def test_split_by_condition_order(mocker):
+    pred = mocker.Mock(side_effect=lambda each: each % 3)
+    assert utils.split_by_condition(pred, [5, 1, 2, 3, 4, 6]) == [
+        [5, 2],
+        [1, 4],
+        [3, 6],
+    ]
+    assert pred.call_count == 6
+
+
 @pytest.mark.parametrize(
     "value, depth, width, expected",
     [
@@ -74,3 +91,84 @@ def test_split_by_condition(func, iterator, expected):
 )
 def test_indent(value, depth, width, expected):
     assert utils.indent(value, depth, width) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["foo", "foo\n bar", "", "foo\n\nbar", "int val = 123;\nauto ptr = &val;"],
+)
+def test_emitter_matches_indent(value):
+    buffer = io.StringIO()
+    emitter = utils.Emitter(buffer, width=3)
+    emitter.write("{\n")
+    with emitter.indented(2):
+        emitter.write(value)
+    emitter.write("\n}")
+    assert buffer.getvalue() == "{\n" + utils.indent(value, 2, 3) + "\n}"
+
+
+def test_emitter_nested():
+    buffer = io.StringIO()
+    emitter = utils.Emitter(buffer)
+    emitter.write("class A\n{\n")
+    with emitter.indented():
+        emitter.write("void f()")
+        emitter.write("\n{\n")
+        with emitter.indented():
+            emitter.write("g();\n")
+        emitter.write("}\n")
+    emitter.write("};")
+    assert buffer.getvalue() == "class A\n{\n  void f()\n  {\n    g();\n  }\n};"
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / "file.txt"
+    utils.write_atomic(str(path), "foo")
+    assert path.read_text() == "foo"
+    utils.write_atomic(str(path), "bar")
+    assert path.read_text() == "bar"
+    assert os.listdir(tmp_path) == ["file.txt"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="no umask on Windows")
+def test_write_atomic_mode(tmp_path, mocker):
+    path = tmp_path / "file.txt"
+    old = os.umask(0o027)
+    try:
+        umask = mocker.spy(os, "umask")
+        utils.write_atomic(str(path), "foo")
+        assert umask.call_count == 0
+    finally:
+        os.umask(old)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+
+def test_write_atomic_failure(tmp_path):
+    with pytest.raises(utils.DrMockRuntimeError):
+        utils.write_atomic(str(tmp_path / "no" / "such" / "dir.txt"), "foo")
+
+
+def test_write_if_changed(tmp_path):
+    path = tmp_path / "file.txt"
+    assert utils.write_if_changed(str(path), "foo")
+    os.utime(path, (0, 0))
+    assert not utils.write_if_changed(str(path), "foo")
+    assert os.stat(path).st_mtime == 0
+    assert utils.write_if_changed(str(path), "bar")
+    assert path.read_text() == "bar"
+
+
+def test_add_slots():
+    @utils.add_slots
+    @dataclasses.dataclass(frozen=True)
+    class Point:
+        x: int
+        y: int = 0
+
+    point = Point(1)
+    assert Point.__slots__ == ("x", "y")
+    assert not hasattr(point, "__dict__")
+    assert (point.x, point.y) == (1, 0)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        point.x = 2
+    assert copy.deepcopy(point) == point
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2021 Malte Kliemann, Ole Kliemann
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import time
+
+import pytest
+
+from drmock import commandline
+from drmock import translator
+from drmock import watch
+
+
+@pytest.fixture
+def header(tmp_path):
+    (tmp_path / "base.h").write_text("using T = int;\n")
+    path = tmp_path / "IFoo.h"
+    path.write_text('#include "base.h"\nclass IFoo { virtual T f() = 0; };\n')
+    return path
+
+
+def _parse_args(header, *args):
+    return commandline.parse_args(
+        [str(header), str(header.parent / "FooMock.h"), "-i", "I(.*)"]
+        + list(args)
+        + ["--flags", "--std=c++17"]
+    )
+
+
+def _touch(path, content):
+    path.write_text(content)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class TestWatcher:
+    def test_poll(self, header, mocker):
+        watcher = watch.Watcher(_parse_args(header))
+        output = str(header.parent / "FooMock.h")
+        assert output in watcher.poll()
+        reparse = mocker.spy(translator, "reparse")
+        assert watcher.poll() == []
+        reparse.assert_not_called()
+
+        _touch(header, header.read_text().replace("f()", "g()"))
+        assert output in watcher.poll()
+        assert reparse.call_count == 1
+        assert "g()" in (header.parent / "FooMock.h").read_text()
+
+        _touch(header.parent / "base.h", "using T = float;\n")
+        watcher.poll()
+        assert reparse.call_count == 2
+
+    def test_poll_failure(self, header, mocker):
+        watcher = watch.Watcher(_parse_args(header))
+        watcher.poll()
+        _touch(header, "class IFoo { syntax error }")
+        assert watch.poll([watcher]) == 1
+        assert watch.poll([watcher]) == 0  # No retry without changes.
+        _touch(header, "class IFoo { virtual void h() = 0; };")
+        assert watch.poll([watcher]) == 0
+        assert "h()" in (header.parent / "FooMock.h").read_text()
+
+
+def test_watch(header, mocker):
+    sleep = mocker.patch.object(time, "sleep", side_effect=[None, KeyboardInterrupt])
+    poll = mocker.spy(watch, "poll")
+    watch.watch([_parse_args(header)], interval=0.1)
+    assert poll.call_count == 2
+    sleep.assert_called_with(0.1)